@@ -3,6 +3,12 @@ ASGI config for asha_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live dashboard feed (/events/) is an async streaming view: it holds one
+connection per open dashboard, which only scales under an ASGI server (e.g.
+`uvicorn asha_project.asgi:application`). It is off unless
+LIVE_EVENTS_ENABLED is set, so WSGI deployments are not affected. Request
+exports stream in constant memory under both (see core_app/export.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core_app.metrics.MetricsMiddleware',  # outermost, so it times the whole stack
+    'core_app.db_router.ReplicaRoutingMiddleware',  # before sessions, so session writes pin reads too
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +56,7 @@ ROOT_URLCONF = 'asha_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core_app.metrics.TimedDjangoTemplates',  # DjangoTemplates + render timing
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,6 +86,14 @@ DATABASES = {
     }
 }
 
+# Read replicas (see core_app/db_router.py). Add each replica to DATABASES,
+# e.g. DATABASES['replica'] = {**DATABASES['default'], 'HOST': 'replica-host',
+# 'TEST': {'MIRROR': 'default'}}, and list its alias here. Reads go to replicas,
+# writes and locking reads to 'default'.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['core_app.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 10  # after a write, that browser reads from the primary this long
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,4 +143,119 @@ MONGO_HOST = 'localhost'
 MONGO_PORT = 27017
 MONGO_URI = f"mongodb://{MONGO_HOST}:{MONGO_PORT}/"
 
+# One shared MongoClient (connection pool) per worker process, see core_app/mongo.py
+MONGO_MAX_POOL_SIZE = 50                    # max sockets per worker process
+MONGO_MIN_POOL_SIZE = 0
+MONGO_MAX_IDLE_TIME_MS = 60000              # recycle idle sockets after 1 minute
+MONGO_CONNECT_TIMEOUT_MS = 2000
+MONGO_SOCKET_TIMEOUT_MS = 5000
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 2000    # fail fast instead of hanging a request
+
+# Alert read cache, see core_app/alerts.py
+ALERTS_CACHE_TTL = 30            # seconds a worker may serve alerts from memory
+ALERTS_CACHE_ALIAS = None        # set to a shared CACHES alias (Redis/Memcached) for multi-worker setups
+ALERTS_SHARED_CACHE_TTL = 3600   # seconds a versioned result lives in the shared cache
+
+# Alert lifecycle (see core_app/alerts.py). Inactive and expired alerts are
+# moved to the `alerts_archive` collection; schedule `manage.py archive_alerts`
+# to sweep expired ones between posts.
+ALERTS_DEFAULT_LIFETIME_HOURS = 72    # expires_at when the poster doesn't choose one
+ALERTS_MAX_LIFETIME_HOURS = 24 * 30
+ALERTS_TTL_GRACE_DAYS = 7             # MongoDB deletes live alerts this long after expiry if never archived
+ALERTS_ARCHIVE_RETENTION_DAYS = None  # days to keep archived alerts; None keeps them forever
+ALERTS_MAX_ACTIVE = 20                # cap on alerts shown per page
+
+# Completed/Cancelled requests untouched this many days are moved to the
+# archive table by `manage.py archive_requests` (see core_app/archive.py)
+REQUEST_ARCHIVE_AFTER_DAYS = 30
+
+# Admin changelists on PostgreSQL show the planner's row estimate instead of an
+# exact COUNT(*) for unfiltered tables at least this large
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Sessions and logins. During a login storm every login writes a session row
+# with the default 'db' engine. 'django.contrib.sessions.backends.cache' keeps
+# sessions in SESSION_CACHE_ALIAS (use a shared Redis/Memcached cache with several
+# workers); 'django.contrib.sessions.backends.signed_cookies' needs no server storage.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_CACHE_ALIAS = 'default'
+# Seconds; last_login is refreshed at most this often (0 = every login). Password reset
+# tokens are only invalidated by a login that writes last_login: set 0 if the
+# password reset views are enabled (see update_last_login_throttled).
+LAST_LOGIN_UPDATE_INTERVAL = 300
+
+# Anonymous full-page cache (landing page), see core_app/pagecache.py
+PAGE_CACHE_TTL = 30      # seconds before a worker re-renders even without a version bump
+PAGE_CACHE_MAX_AGE = 10  # Cache-Control max-age for browsers/CDNs; ETag revalidation after that
+
+# Volunteer auto-assignment search, see core_app/services.py
+VOLUNTEER_SEARCH_K = 20                 # stop widening once this many free volunteers are nearby
+VOLUNTEER_SEARCH_RADIUS_KM = 5          # initial search radius around the request
+VOLUNTEER_SEARCH_MAX_RADIUS_KM = 200    # beyond this, fall back to scanning every volunteer
+
+# Queued auto-assignment jobs, see core_app/jobs.py (run `manage.py assignment_worker`)
+ASSIGNMENT_JOB_MAX_ATTEMPTS = 5            # then the job is marked failed
+ASSIGNMENT_JOB_RETRY_DELAY_SECONDS = 30    # first retry delay, doubled on each attempt
+ASSIGNMENT_JOB_TIMEOUT_SECONDS = 300       # a 'running' job older than this is reclaimed (crashed worker)
+ASSIGNMENT_JOB_RERANKS = 3                 # volunteers tried when the best one was just taken by another worker
+ASSIGNMENT_JOB_REQUIRE_CAPACITY = False    # True: retry instead of assigning an already busy volunteer
+
+# Batch auto-assignment cost weights, in km-equivalents (see core_app/assignment.py)
+BATCH_ASSIGN_SKILL_PENALTY_KM = 50      # volunteer's skill tags don't cover the request type
+BATCH_ASSIGN_ROLE_PENALTY_KM = 100      # staff member who isn't registered as a volunteer
+BATCH_ASSIGN_LOAD_PENALTY_KM = 10       # per task the volunteer already has
+
+# Rows per page on the volunteer dashboard request list (keyset-paginated)
+VOLUNTEER_DASHBOARD_PAGE_SIZE = 50
+
+# Rows fetched per server-side cursor round trip when exporting requests
+EXPORT_CHUNK_SIZE = 2000
+
+# Volunteer location pings are buffered and written in batches, see core_app/locations.py
+LOCATION_FLUSH_INTERVAL = 5             # seconds between batched writes (0 = write immediately)
+LOCATION_MIN_INTERVAL_SECONDS = 10      # store at most one fix per volunteer per this many seconds
+
+# Live dashboard feed (server-sent events), see core_app/events.py
+# Each open dashboard holds a connection for as long as it is open: enable only when
+# serving with an ASGI server (asha_project/asgi.py), never under a WSGI server.
+LIVE_EVENTS_ENABLED = False
+LIVE_EVENTS_HEARTBEAT = 15      # seconds between keep-alive comments on idle streams
+LIVE_EVENTS_HISTORY = 256       # recent events kept for clients reconnecting with Last-Event-ID
+LIVE_EVENTS_QUEUE_SIZE = 100    # per-client backlog before the oldest events are dropped
+# None: events reach only clients of the process that published them. 'mongo': relay
+# them through a capped collection, so assignment_worker changes and other ASGI
+# workers' events show up too.
+LIVE_EVENTS_BROKER = None
+LIVE_EVENTS_BROKER_SIZE = 1024 * 1024   # bytes of the capped relay collection
+
+# Clustered request map tiles, see core_app/clusters.py
+MAP_MAX_ZOOM = 18                   # highest tile zoom served (and invalidated)
+MAP_CLUSTER_CELLS_PER_TILE = 8      # approximate clusters across one tile
+MAP_CLUSTER_CACHE_ALIAS = 'default' # use a shared CACHES alias (Redis/Memcached) with several workers
+MAP_CLUSTER_CACHE_TTL = 300         # seconds; bounds staleness where eviction can't reach
+
+# "Nearest pending requests to me" for volunteers, see core_app/nearby.py
+NEARBY_SEARCH_RADIUS_KM = 5       # initial search radius, doubled until k requests are found
+NEARBY_MAX_RADIUS_KM = 50         # stop widening here
+NEARBY_CELL_PRECISION = 5         # volunteers in one geohash cell (~5 km) share a cached candidate list
+NEARBY_REGION_PRECISION = 3       # request changes invalidate cached lists per region (~150 km)
+NEARBY_CACHE_ALIAS = 'default'    # use a shared CACHES alias (Redis/Memcached) with several workers
+NEARBY_CACHE_TTL = 60             # seconds
+
+# Duplicate request detection on submission, see core_app/dedup.py
+DUPLICATE_REQUEST_RADIUS_KM = 0.2          # same-type open requests this close are duplicates (0 disables)
+DUPLICATE_REQUEST_WINDOW_MINUTES = 120     # ...if submitted within this many minutes
+
+# Volunteer skill tags, see core_app/skills.py. Overrides the synonym list of any
+# request category, e.g. {'Medical': ['medic', 'doctor', 'nurse', 'midwife']}.
+# Run `manage.py index_skills` after changing it.
+SKILL_SYNONYMS = {}
+
+# Prometheus metrics at /metrics, see core_app/metrics.py
+# Superusers can always read it; scrapers send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = ''          # empty = no token access
+# Clients allowed by address alone. Leave empty behind a reverse proxy, where
+# REMOTE_ADDR is the proxy's address for every request, public ones included.
+METRICS_ALLOWED_IPS = []
+
 # AUTH_USER_MODEL = "core_app.CustomUser"
@@ -2,9 +2,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from core_app.views import landing_page_view  # root landing page
+from core_app.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
     path('', landing_page_view, name='landing_page'),  # only "/" goes here
     path('', include('core_app.urls')),                # everything else from core_app
 ]
@@ -0,0 +1,14 @@
+"""
+Benchmark suite for the Asha hot paths.
+
+Runs fully offline: SQLite for the relational data and an in-memory stand-in
+for MongoDB. Each scale gets a freshly migrated database filled by a seeded
+synthetic data generator, and results are written as JSON so runs from
+different commits can be compared:
+
+    python -m benchmarks.run --scales small,medium --output before.json
+    python -m benchmarks.run --scales small,medium --output after.json
+    python -m benchmarks.compare before.json after.json
+
+Login throughput per session engine has its own runner, benchmarks.logins.
+"""
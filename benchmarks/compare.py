@@ -0,0 +1,41 @@
+# benchmarks/compare.py
+"""
+Compare two benchmark result files (median latency per scale and benchmark).
+
+    python -m benchmarks.compare before.json after.json
+"""
+import json
+import sys
+
+
+def _medians(report):
+    return {
+        (run['scale'], name): stats
+        for run in report['runs']
+        for name, stats in run['benchmarks'].items()
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+
+    with open(argv[0]) as f:
+        before = json.load(f)
+    with open(argv[1]) as f:
+        after = json.load(f)
+
+    old, new = _medians(before), _medians(after)
+    print(f"{'scale':<8} {'benchmark':<32} {'before ms':>10} {'after ms':>10} {'change':>8} {'queries':>9}")
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key], new[key]
+        ratio = n['median_ms'] / o['median_ms'] if o['median_ms'] else float('inf')
+        queries = f"{o['queries']}->{n['queries']}"
+        print(f"{key[0]:<8} {key[1]:<32} {o['median_ms']:>10.3f} {n['median_ms']:>10.3f} {ratio:>7.2f}x {queries:>9}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# benchmarks/datagen.py
+"""
+Seeded synthetic disaster-scale data.
+
+Volunteers are scattered around a region centre with skill bios drawn from a
+small vocabulary; relief requests cluster around a few hotspots with a
+realistic status mix; alerts get a spread of severities and timestamps.
+The same seed always produces the same data.
+"""
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core_app.geo import encode_geohash
+from core_app.models import Profile, ReliefRequest
+from core_app.skills import parse_skill_tags
+
+SCALES = {
+    'small': {'volunteers': 200, 'victims': 500, 'requests': 1000, 'alerts': 20},
+    'medium': {'volunteers': 2000, 'victims': 5000, 'requests': 10000, 'alerts': 100},
+    'large': {'volunteers': 10000, 'victims': 20000, 'requests': 50000, 'alerts': 500},
+}
+
+REGION_CENTER = (28.6139, 77.2090)   # New Delhi, the dashboard map's default
+REGION_RADIUS_DEG = 1.5
+
+STATUS_MIX = [
+    ('Pending', 0.30),
+    ('Assigned', 0.15),
+    ('En Route', 0.10),
+    ('Completed', 0.40),
+    ('Cancelled', 0.05),
+]
+
+SKILL_PHRASES = [
+    'medical first aid', 'doctor', 'nurse', 'food distribution', 'cooking',
+    'water purification', 'shelter setup', 'carpentry', 'boat rescue',
+    'swimming', 'driving', 'logistics', 'translation', 'other support',
+]
+
+ALERT_SEVERITIES = ['Low', 'Medium', 'High', 'Critical']
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def _point(rng, center, spread):
+    return (
+        round(center[0] + rng.uniform(-spread, spread), 6),
+        round(center[1] + rng.uniform(-spread, spread), 6),
+    )
+
+
+def generate(volunteers, victims, requests, alerts, alerts_collection=None, seed=42, batch_size=2000):
+    """Fill the database (and `alerts_collection`, if given) with synthetic data."""
+    rng = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+
+    # --- Users ---
+    users = [
+        User(username=f'volunteer{i}', password=password, is_staff=True, is_active=True)
+        for i in range(volunteers)
+    ] + [
+        User(username=f'victim{i}', password=password)
+        for i in range(victims)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    user_ids = dict(User.objects.values_list('username', 'id'))
+    volunteer_ids = [user_ids[f'volunteer{i}'] for i in range(volunteers)]
+    victim_ids = [user_ids[f'victim{i}'] for i in range(victims)]
+
+    # --- Profiles (bulk_create sends no post_save, so create them here) ---
+    profiles = []
+    for user_id in volunteer_ids:
+        lat, lon = _point(rng, REGION_CENTER, REGION_RADIUS_DEG)
+        bio = ', '.join(rng.sample(SKILL_PHRASES, 2))
+        profiles.append(Profile(
+            user_id=user_id,
+            role='volunteer',
+            phone_number='0000000000',
+            full_name=f'Volunteer {user_id}',
+            skills_bio=bio,
+            skill_tags=parse_skill_tags(bio),
+            latitude=lat,
+            longitude=lon,
+            geohash=encode_geohash(lat, lon),
+            location_updated_at=timezone.now(),
+        ))
+    profiles += [Profile(user_id=user_id, role='victim', phone_number='0000000000') for user_id in victim_ids]
+    Profile.objects.bulk_create(profiles, batch_size=batch_size)
+
+    # --- Relief requests ---
+    hotspots = [_point(rng, REGION_CENTER, REGION_RADIUS_DEG) for _ in range(8)]
+    statuses, weights = zip(*STATUS_MIX)
+    types = [t for t, _ in ReliefRequest.REQUEST_TYPE_CHOICES]
+    active_counts = {}
+    rows = []
+    for _ in range(requests):
+        status = rng.choices(statuses, weights)[0]
+        assignee = None if status == 'Pending' else rng.choice(volunteer_ids)
+        if assignee and status in ReliefRequest.ACTIVE_STATUSES:
+            active_counts[assignee] = active_counts.get(assignee, 0) + 1
+        lat, lon = _point(rng, rng.choice(hotspots), 0.2)
+        rows.append(ReliefRequest(
+            requester_id=rng.choice(victim_ids),
+            request_type=rng.choice(types),
+            description='Synthetic benchmark request',
+            latitude=lat,
+            longitude=lon,
+            geohash=encode_geohash(lat, lon),
+            status=status,
+            assigned_to_volunteer_id=assignee,
+        ))
+    ReliefRequest.objects.bulk_create(rows, batch_size=batch_size)
+
+    # auto_now_add ignores explicit values; spread created_at over the last 3 days
+    start = timezone.now() - datetime.timedelta(days=3)
+    ids = list(ReliefRequest.objects.order_by('id').values_list('id', flat=True))
+    step = max(1, len(ids) // 72)
+    for hour, i in enumerate(range(0, len(ids), step)):
+        ReliefRequest.objects.filter(id__gte=ids[i], id__lte=ids[min(i + step, len(ids)) - 1]).update(
+            created_at=start + datetime.timedelta(hours=hour)
+        )
+
+    for user_id, count in active_counts.items():
+        Profile.objects.filter(user_id=user_id).update(active_task_count=count)
+
+    # --- Alerts ---
+    if alerts_collection is not None:
+        now = timezone.now()
+        for i in range(alerts):
+            alerts_collection.insert_one({
+                'message': f'Synthetic alert {i}',
+                'severity': rng.choice(ALERT_SEVERITIES),
+                'is_active': rng.random() < 0.3,
+                'posted_by': 'admin',
+                'timestamp': now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+                'expires_at': now + datetime.timedelta(hours=rng.randint(1, 72)),
+            })
+
+    return {
+        'volunteer_ids': volunteer_ids,
+        'victim_ids': victim_ids,
+    }
@@ -0,0 +1,115 @@
+# benchmarks/logins.py
+"""
+Login throughput: real POSTs to /login/ through the full middleware stack,
+once per session engine, with the project's production password hasher.
+
+    python -m benchmarks.logins --users 200 --engines db,cache,signed_cookies -o logins.json
+
+Each engine logs every user in once from a fresh client and reports logins
+per second and SQL queries per login. Run it on two commits to compare.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+PASSWORD = 'login-bench-password'
+
+
+def _create_users(count, batch_size=1000):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    from core_app.models import Profile
+
+    password = make_password(PASSWORD)  # one hash, shared: hashing cost is paid at login
+    users = [User(username=f'login{i}', password=password, is_staff=i % 4 == 0) for i in range(count)]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    user_ids = User.objects.filter(username__startswith='login').values_list('id', flat=True)
+    Profile.objects.bulk_create(
+        [Profile(user_id=user_id, role='victim', phone_number='0000000000') for user_id in user_ids],
+        batch_size=batch_size,
+    )
+    return [f'login{i}' for i in range(count)]
+
+
+def run_logins(usernames, engine):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from .suite import QueryCounter
+
+    queries = QueryCounter()
+    with override_settings(SESSION_ENGINE=ENGINES[engine]), connection.execute_wrapper(queries):
+        started = time.perf_counter()
+        for username in usernames:
+            response = Client().post('/login/', {'username': username, 'password': PASSWORD})
+            assert response.status_code == 302, (username, response.status_code)
+        elapsed = time.perf_counter() - started
+    return {
+        'logins': len(usernames),
+        'seconds': round(elapsed, 3),
+        'logins_per_second': round(len(usernames) / elapsed, 1),
+        'queries_per_login': round(queries.count / len(usernames), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--engines', default='db,cache,signed_cookies',
+                        help=f"Comma-separated session engines: {', '.join(ENGINES)}.")
+    parser.add_argument('--fast-hasher', action='store_true',
+                        help="Keep the benchmark settings' MD5 hasher instead of the production default.")
+    parser.add_argument('--output', '-o', help="Write JSON here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    from django.conf import global_settings, settings
+    from django.contrib.auth.models import User
+    from django.test.utils import override_settings
+
+    from .run import _fresh_database, _fresh_mongo, _git_commit
+
+    hashers = settings.PASSWORD_HASHERS if args.fast_hasher else global_settings.PASSWORD_HASHERS
+    results = {}
+    with override_settings(PASSWORD_HASHERS=hashers):
+        _fresh_database()
+        _fresh_mongo()
+        usernames = _create_users(args.users)
+        for engine in args.engines.split(','):
+            print(f"[{engine}] {args.users} logins", file=sys.stderr)
+            # Every user logs in fresh per engine, so last_login throttling doesn't hide writes
+            User.objects.filter(username__in=usernames).update(last_login=None)
+            results[engine] = run_logins(usernames, engine)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'hasher': hashers[0],
+        },
+        'engines': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
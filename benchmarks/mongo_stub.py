@@ -0,0 +1,130 @@
+# benchmarks/mongo_stub.py
+"""
+Minimal in-memory stand-in for the parts of pymongo the app uses.
+
+Supports equality, comparison ($gt, $gte, $lt, $lte, $in, $exists), $not
+and $or filters, find()/find_one() with sort, limit and projection, insert_one() and
+create_index() (a no-op). Enough to benchmark the views without a MongoDB
+server; not a general-purpose mock.
+"""
+from bson.objectid import ObjectId
+
+
+_MISSING = object()
+
+_OPERATORS = {
+    '$gt': lambda value, arg: value is not _MISSING and value is not None and value > arg,
+    '$gte': lambda value, arg: value is not _MISSING and value is not None and value >= arg,
+    '$lt': lambda value, arg: value is not _MISSING and value is not None and value < arg,
+    '$lte': lambda value, arg: value is not _MISSING and value is not None and value <= arg,
+    '$in': lambda value, arg: value in arg,
+    '$exists': lambda value, arg: (value is not _MISSING) == bool(arg),
+    # Like MongoDB, also true for documents without the field
+    '$not': lambda value, arg: not all(_OPERATORS[op](value, a) for op, a in arg.items()),
+}
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = document.get(key, _MISSING)
+        if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            if not all(_OPERATORS[op](value, arg) for op, arg in condition.items()):
+                return False
+        elif (None if value is _MISSING else value) != condition:
+            return False
+    return True
+
+
+def _project(document, projection):
+    if not projection:
+        return dict(document)
+    included = {k for k, v in projection.items() if v}
+    if included:
+        result = {k: document[k] for k in included if k in document}
+        if projection.get('_id', 1) and '_id' in document:
+            result['_id'] = document['_id']
+        return result
+    return {k: v for k, v in document.items() if projection.get(k, 1)}
+
+
+class InMemoryCursor:
+    def __init__(self, documents, projection=None):
+        self._documents = documents
+        self._projection = projection
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, field_direction in reversed(keys):
+            self._documents.sort(key=lambda d: d.get(field), reverse=field_direction < 0)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def __iter__(self):
+        documents = self._documents[:self._limit] if self._limit else self._documents
+        return (_project(d, self._projection) for d in documents)
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InMemoryCollection:
+    def __init__(self):
+        self._documents = []
+
+    def create_index(self, keys, **kwargs):
+        return kwargs.get('name', '_'.join(str(k) for k, _ in keys))
+
+    def insert_one(self, document):
+        document.setdefault('_id', ObjectId())
+        self._documents.append(dict(document))
+        return InsertOneResult(document['_id'])
+
+    def insert_many(self, documents):
+        for document in documents:
+            self.insert_one(document)
+
+    def find(self, query=None, projection=None, sort=None, limit=0):
+        cursor = InMemoryCursor(
+            [d for d in self._documents if _matches(d, query or {})],
+            projection,
+        )
+        if sort:
+            cursor.sort(sort)
+        if limit:
+            cursor.limit(limit)
+        return cursor
+
+    def find_one(self, query=None, projection=None, sort=None):
+        return next(iter(self.find(query, projection, sort=sort, limit=1)), None)
+
+    def count_documents(self, query):
+        return sum(1 for d in self._documents if _matches(d, query))
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        return self._collections.setdefault(name, InMemoryCollection())
+
+
+class InMemoryMongoClient:
+    def __init__(self):
+        self._databases = {}
+
+    def __getitem__(self, name):
+        return self._databases.setdefault(name, InMemoryDatabase())
+
+    def close(self):
+        pass
@@ -0,0 +1,109 @@
+# benchmarks/run.py
+"""
+Run the benchmark suite at one or more scales and write JSON results.
+
+    python -m benchmarks.run --scales small,medium --repeat 20 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fresh_database():
+    from django.core.management import call_command
+    from django.db import connection
+
+    connection.close()
+    name = connection.settings_dict['NAME']
+    if os.path.exists(name):
+        os.remove(name)
+    call_command('migrate', verbosity=0)
+
+
+def _fresh_mongo():
+    """Point the shared Mongo client at an empty in-memory stand-in."""
+    from core_app import alerts, mongo
+    from .mongo_stub import InMemoryMongoClient
+
+    mongo._client = InMemoryMongoClient()
+    mongo._client_pid = os.getpid()
+    alerts.bump_version()
+    return alerts._collection()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='small', help="Comma-separated scale names or N:M:K custom scales "
+                        "(volunteers:requests:alerts).")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', '-o', help="Write JSON here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    from .datagen import SCALES, generate
+    from .suite import run_suite
+
+    runs = []
+    for scale_name in args.scales.split(','):
+        if ':' in scale_name:
+            volunteers, requests, alerts = (int(v) for v in scale_name.split(':'))
+            params = {'volunteers': volunteers, 'victims': max(1, requests // 2), 'requests': requests, 'alerts': alerts}
+        else:
+            params = SCALES[scale_name]
+
+        print(f"[{scale_name}] generating {params}", file=sys.stderr)
+        _fresh_database()
+        alerts_collection = _fresh_mongo()
+        started = time.perf_counter()
+        generate(alerts_collection=alerts_collection, seed=args.seed, **params)
+        generate_seconds = time.perf_counter() - started
+
+        print(f"[{scale_name}] running suite", file=sys.stderr)
+        runs.append({
+            'scale': scale_name,
+            'params': params,
+            'generate_seconds': round(generate_seconds, 2),
+            'benchmarks': run_suite(repeat=args.repeat, seed=args.seed),
+        })
+
+    from core_app import services
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'numpy': services.np is not None,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'runs': runs,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
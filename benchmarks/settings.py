@@ -0,0 +1,23 @@
+# benchmarks/settings.py
+"""Project settings with SQLite and synchronous location writes, for offline benchmarks."""
+import os
+import tempfile
+
+from asha_project.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB', os.path.join(tempfile.gettempdir(), 'asha_bench.sqlite3')),
+    }
+}
+
+# Hashing is not what we measure; logins in the suite use force_login anyway
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Measure the write path itself: no buffering, no per-user throttling
+LOCATION_FLUSH_INTERVAL = 0
+LOCATION_MIN_INTERVAL_SECONDS = 0
@@ -0,0 +1,102 @@
+# benchmarks/suite.py
+"""The timed hot paths. Each benchmark reports per-operation latency in ms and SQL query count."""
+import itertools
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+
+from core_app.models import Profile, ReliefRequest
+
+from .datagen import BENCH_PASSWORD
+from core_app.services import calculate_distance, choose_best_volunteer, distance_matrix
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries (survives the reset_queries done per request)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(fn, repeat):
+    """Run `fn` once to warm up and once while counting queries, then `repeat` timed times."""
+    fn()
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(timings), 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'mean_ms': round(statistics.fmean(timings), 4),
+        'queries': queries.count,
+    }
+
+
+def _get(client, url):
+    def fn():
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+    return fn
+
+
+def run_suite(repeat=20, seed=42):
+    rng = random.Random(seed)
+    results = {}
+
+    volunteer = User.objects.filter(is_staff=True).order_by('id').first()
+    victim = User.objects.filter(is_staff=False, submitted_requests__isnull=False).order_by('id').first()
+
+    # --- Services ---
+    pending = itertools.cycle(list(ReliefRequest.objects.filter(status='Pending').order_by('id')[:max(repeat, 1)]))
+    results['choose_best_volunteer'] = measure(lambda: choose_best_volunteer(next(pending)), repeat)
+
+    coords = list(
+        Profile.objects.filter(latitude__isnull=False)
+        .order_by('id')
+        .values_list('latitude', 'longitude')
+    )
+    origin = coords[0]
+    sample = [rng.choice(coords) for _ in range(1000)]
+    results['calculate_distance x1000'] = measure(
+        lambda: [calculate_distance(origin[0], origin[1], lat, lon) for lat, lon in sample],
+        repeat,
+    )
+    results[f'distance_matrix 1x{len(coords)}'] = measure(lambda: distance_matrix(origin, coords), repeat)
+
+    # --- Views ---
+    volunteer_client = Client()
+    volunteer_client.force_login(volunteer)
+    victim_client = Client()
+    victim_client.force_login(victim)
+    anonymous_client = Client()
+
+    results['volunteer_dashboard_view'] = measure(_get(volunteer_client, '/volunteer/dashboard/'), repeat)
+    results['dashboard_view'] = measure(_get(victim_client, '/dashboard/'), repeat)
+    results['landing_page_view'] = measure(_get(anonymous_client, '/'), repeat)
+
+    def post_login():
+        response = Client().post('/login/', {'username': victim.username, 'password': BENCH_PASSWORD})
+        assert response.status_code == 302, response.status_code
+    results['login_view'] = measure(post_login, repeat)
+
+    def post_location():
+        lat, lon = rng.choice(coords)
+        response = volunteer_client.post('/update-location/', {'latitude': str(lat), 'longitude': str(lon)})
+        assert response.status_code == 200, response.content
+    results['update_location'] = measure(post_location, repeat)
+
+    return results
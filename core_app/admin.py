@@ -1,18 +1,124 @@
 # core_app/admin.py
-from django.contrib import admin
-from .models import Profile, ReliefRequest
+"""
+Admin for profiles and relief requests, kept usable with tens of thousands of users:
+related users are joined into the changelist query, user fields are
+autocomplete widgets instead of a <select> of every user, big unfiltered
+lists use an estimated count, and bulk actions run as single UPDATEs.
+"""
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import ArchivedReliefRequest, AssignmentJob, Profile, ReliefRequest
+from .pagination import EstimatedCountPaginator
+
 
 # Register the Profile model
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'role', 'phone_number', 'full_name')
-    list_filter = ('role',)
+    list_display = ('user', 'role', 'phone_number', 'full_name', 'is_approved')
+    list_filter = ('role', 'user__is_active')
     search_fields = ('user__username', 'full_name', 'phone_number')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skip the second, unfiltered COUNT(*) when filtering
+    actions = ['approve_volunteers']
+
+    @admin.display(boolean=True, description='Approved', ordering='user__is_active')
+    def is_approved(self, profile):
+        return profile.user.is_active
+
+    @admin.action(description='Approve selected volunteers')
+    def approve_volunteers(self, request, queryset):
+        # One UPDATE ... WHERE id IN (SELECT user_id ...)
+        approved = User.objects.filter(
+            profile__in=queryset.filter(role='volunteer'), is_active=False,
+        ).update(is_active=True, is_staff=True)
+        self.message_user(request, f"{approved} volunteers approved.", messages.SUCCESS)
+
+
+class ReliefRequestActionForm(ActionForm):
+    volunteer = forms.CharField(
+        required=False, label='Volunteer username',
+        help_text='Used by "Assign selected requests to volunteer".',
+    )
+
 
 # Register the ReliefRequest model
 @admin.register(ReliefRequest)
 class ReliefRequestAdmin(admin.ModelAdmin):
-    list_display = ('id', 'requester', 'request_type', 'status', 'assigned_to_volunteer', 'created_at')
+    list_display = ('id', 'requester', 'request_type', 'status', 'assigned_to_volunteer', 'report_count', 'created_at')
     list_filter = ('status', 'request_type')
     search_fields = ('requester__username', 'description')
-    list_editable = ('status', 'assigned_to_volunteer') # Allows direct editing from the list view!
\ No newline at end of file
+    # Allows direct editing from the list view! The assignee uses the autocomplete widget
+    list_editable = ('status', 'assigned_to_volunteer')
+    list_select_related = ('requester', 'assigned_to_volunteer')
+    autocomplete_fields = ('requester', 'assigned_to_volunteer', 'co_requesters')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = ReliefRequestActionForm
+    actions = ['assign_to_volunteer', 'cancel_requests', 'queue_auto_assignment']
+
+    @admin.action(description='Assign selected requests to volunteer')
+    def assign_to_volunteer(self, request, queryset):
+        from .assignment import bulk_update_requests
+
+        username = request.POST.get('volunteer', '').strip()
+        volunteer = User.objects.filter(username=username, is_staff=True, is_active=True).first()
+        if volunteer is None:
+            self.message_user(request, f"No active volunteer named '{username}'.", messages.ERROR)
+            return
+        assigned = bulk_update_requests(
+            queryset.exclude(status__in=ReliefRequest.CLOSED_STATUSES), 'Assigned', volunteer=volunteer,
+        )
+        self.message_user(request, f"{assigned} requests assigned to {volunteer.username}.", messages.SUCCESS)
+
+    @admin.action(description='Cancel selected requests')
+    def cancel_requests(self, request, queryset):
+        from .assignment import bulk_update_requests
+
+        cancelled = bulk_update_requests(queryset.exclude(status__in=ReliefRequest.CLOSED_STATUSES), 'Cancelled')
+        self.message_user(request, f"{cancelled} requests cancelled.", messages.SUCCESS)
+
+    @admin.action(description='Queue auto-assignment for selected pending requests')
+    def queue_auto_assignment(self, request, queryset):
+        pending_ids = list(queryset.filter(status='Pending').values_list('id', flat=True))
+        open_jobs = AssignmentJob.objects.filter(
+            relief_request_id__in=pending_ids, status__in=AssignmentJob.OPEN_STATUSES,
+        )
+        with transaction.atomic():
+            already_queued = open_jobs.count()
+            # Requests that already have an open job are skipped by the job_one_open_per_request constraint
+            AssignmentJob.objects.bulk_create(
+                [AssignmentJob(relief_request_id=pk, requested_by=request.user) for pk in pending_ids],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+            queued = open_jobs.count() - already_queued  # ignore_conflicts returns no ids to count
+        message = f"Auto-assignment queued for {queued} pending requests."
+        if len(pending_ids) > queued:
+            message += f" {len(pending_ids) - queued} were already queued or running."
+        self.message_user(request, message, messages.SUCCESS)
+
+
+# Archived requests are history: browsable, never edited (see core_app/archive.py)
+@admin.register(ArchivedReliefRequest)
+class ArchivedReliefRequestAdmin(admin.ModelAdmin):
+    list_display = ('id', 'requester', 'request_type', 'status', 'assigned_to_volunteer', 'created_at', 'archived_at')
+    list_filter = ('status', 'request_type')
+    search_fields = ('requester__username',)
+    list_select_related = ('requester', 'assigned_to_volunteer')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,357 @@
+# core_app/alerts.py
+"""
+Alerts repository: every query against the MongoDB `alerts` collection lives here.
+
+Views should call these functions instead of talking to pymongo directly, so the
+connection pool, indexes and query shapes are managed in one place.
+
+Lifecycle. Every alert has an `expires_at` (ALERTS_DEFAULT_LIFETIME_HOURS after
+posting unless the poster picks another). Expired alerts stop showing at once.
+Alerts posted before expiry existed have none and stay current until
+`manage.py archive_alerts` gives them one.
+Deactivated, expired and alerts posted inactive are moved to the
+`alerts_archive` collection. This happens on deactivation, on each new post,
+and when `manage.py archive_alerts` runs. The live collection therefore holds
+only current alerts, and reads stay cheap however large the archive grows.
+A TTL index on `expires_at` is a backstop: MongoDB drops live alerts
+ALERTS_TTL_GRACE_DAYS after expiry if archival never ran. The archive can have
+its own TTL too (ALERTS_ARCHIVE_RETENTION_DAYS).
+
+Reads fetch only the fields the pages render, are capped at ALERTS_MAX_ACTIVE,
+and archive history is keyset-paged on (timestamp, _id).
+
+Reads are cached. Alerts only change when an admin posts one, so cached results
+are keyed by an alerts version counter that every write bumps:
+
+  * an in-process cache with a short TTL (ALERTS_CACHE_TTL seconds), and
+  * optionally a shared Django cache (ALERTS_CACHE_ALIAS) holding the version
+    counter and the results, so all workers see a new alert immediately.
+
+Expiry is re-checked on every read, so a cached result never shows an alert
+past its `expires_at`.
+"""
+import datetime
+import logging
+import threading
+import time
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
+
+from . import cacheversion
+from .events import alert_payload, publish
+from .mongo import get_collection
+from .pagination import decode_position, encode_position
+
+logger = logging.getLogger(__name__)
+
+ALERTS_COLLECTION = 'alerts'
+ARCHIVE_COLLECTION = 'alerts_archive'
+
+# Only what the dashboards and the admin page render
+LIST_FIELDS = {'message': 1, 'severity': 1, 'posted_by': 1, 'timestamp': 1, 'expires_at': 1}
+# Only what the landing page banner renders
+BANNER_FIELDS = {'message': 1, 'expires_at': 1}
+
+_indexes_ensured = False
+_indexes_lock = threading.Lock()
+
+
+def _ensure_ttl_index(collection, field, seconds, name):
+    """Create a TTL index on `field`, or update its expiry if the setting changed."""
+    try:
+        collection.create_index([(field, ASCENDING)], name=name, expireAfterSeconds=seconds)
+    except OperationFailure:
+        # Same index with another expireAfterSeconds
+        collection.database.command('collMod', collection.name, index={'name': name, 'expireAfterSeconds': seconds})
+
+
+def ensure_indexes(collection=None, archive=None):
+    """Create the indexes used by the alert queries below (idempotent)."""
+    collection = collection if collection is not None else get_collection(ALERTS_COLLECTION)
+    archive = archive if archive is not None else get_collection(ARCHIVE_COLLECTION)
+    # Latest critical alert on the landing page
+    collection.create_index(
+        [('is_active', ASCENDING), ('severity', ASCENDING), ('timestamp', DESCENDING)],
+        name='active_severity_timestamp',
+    )
+    # All active alerts, newest first (dashboards); also finds inactive ones to archive
+    collection.create_index(
+        [('is_active', ASCENDING), ('timestamp', DESCENDING)],
+        name='active_timestamp',
+    )
+    # Finds expired alerts to archive, and drops them if archival never runs
+    _ensure_ttl_index(
+        collection, 'expires_at',
+        int(getattr(settings, 'ALERTS_TTL_GRACE_DAYS', 7) * 86400),
+        name='expires_at_ttl',
+    )
+    # History pages, newest first
+    archive.create_index([('timestamp', DESCENDING), ('_id', DESCENDING)], name='timestamp_id')
+    retention_days = getattr(settings, 'ALERTS_ARCHIVE_RETENTION_DAYS', None)
+    if retention_days is not None:
+        _ensure_ttl_index(archive, 'archived_at', int(retention_days * 86400), name='archived_at_ttl')
+
+
+def _collection(name=ALERTS_COLLECTION):
+    """Return an alerts collection, ensuring indexes once per worker process."""
+    global _indexes_ensured
+
+    collection = get_collection(name)
+    if not _indexes_ensured:
+        with _indexes_lock:
+            if not _indexes_ensured:
+                try:
+                    ensure_indexes()
+                    _indexes_ensured = True
+                except PyMongoError:
+                    # Don't fail the request; we'll try again on the next call.
+                    logger.warning("Could not ensure MongoDB alert indexes", exc_info=True)
+    return collection
+
+
+# --- Versioned cache ---
+
+VERSION_KEY = 'alerts:version'
+
+_local_version = 0
+_local_cache = {}  # name -> (version, expires_at, value)
+_cache_lock = threading.Lock()
+_MISSING = object()
+
+
+def _shared_cache():
+    alias = getattr(settings, 'ALERTS_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def get_version():
+    """Current alerts version (shared across workers when a cache alias is set)."""
+    shared = _shared_cache()
+    if shared is None:
+        return _local_version
+    version = shared.get(VERSION_KEY)
+    if version is None:
+        # First use or evicted: start a fresh counter. add() keeps a concurrent winner.
+        shared.add(VERSION_KEY, 1, timeout=None)
+        version = shared.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    """Invalidate every cached alert read. Called after each write."""
+    global _local_version
+
+    with _cache_lock:
+        _local_version += 1
+        _local_cache.clear()
+
+    shared = _shared_cache()
+    if shared is not None:
+        cacheversion.bump(shared, VERSION_KEY)
+
+
+def _cached(name, loader):
+    """Return `loader()` cached under `name` for the current alerts version."""
+    version = get_version()
+    now = time.monotonic()
+
+    entry = _local_cache.get(name)
+    if entry is not None and entry[0] == version and entry[1] > now:
+        return entry[2]
+
+    shared = _shared_cache()
+    key = f'alerts:{name}:v{version}'
+    value = shared.get(key, _MISSING) if shared is not None else _MISSING
+    if value is _MISSING:
+        value = loader()
+        if shared is not None:
+            shared.set(key, value, timeout=getattr(settings, 'ALERTS_SHARED_CACHE_TTL', 3600))
+
+    ttl = getattr(settings, 'ALERTS_CACHE_TTL', 30)
+    with _cache_lock:
+        _local_cache[name] = (version, now + ttl, value)
+    return value
+
+
+def _not_expired():
+    """
+    Query clause for alerts that have not expired. Alerts posted before expiry
+    existed have no `expires_at` and count as current until
+    `manage.py archive_alerts` backfills one.
+    """
+    return {'expires_at': {'$not': {'$lte': timezone.now()}}}
+
+
+def _unexpired(alerts):
+    now = timezone.now()
+    return [alert for alert in alerts if alert.get('expires_at') is None or alert['expires_at'] > now]
+
+
+def _max_active():
+    return getattr(settings, 'ALERTS_MAX_ACTIVE', 20)
+
+
+# --- Queries ---
+
+def get_latest_critical_alert():
+    """Newest active, unexpired alert with Critical severity, or None."""
+    criticals = _cached('latest_critical', lambda: list(
+        _collection().find(
+            {'is_active': True, 'severity': 'Critical', **_not_expired()},
+            BANNER_FIELDS,
+        ).sort('timestamp', DESCENDING).limit(_max_active())
+    ))
+    current = _unexpired(criticals)
+    return current[0] if current else None
+
+
+def get_active_alerts():
+    """
+    Active, unexpired alerts, newest first, at most ALERTS_MAX_ACTIVE of them.
+    Each carries its `_id` as a string in `id` for templates.
+    """
+    def load():
+        active = list(
+            _collection().find({'is_active': True, **_not_expired()}, LIST_FIELDS)
+            .sort('timestamp', DESCENDING).limit(_max_active())
+        )
+        for alert in active:
+            alert['id'] = str(alert['_id'])
+        return active
+    return _unexpired(_cached('active', load))
+
+
+def _object_id(value):
+    try:
+        return ObjectId(value)
+    except InvalidId as e:
+        raise ValueError(str(e))
+
+
+def encode_cursor(alert):
+    return encode_position(alert['timestamp'].isoformat(), alert['_id'])
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, _id) from a cursor string, or None if it is missing or invalid."""
+    return decode_position(cursor, datetime.datetime.fromisoformat, _object_id)
+
+
+def get_archived_alerts(cursor=None, page_size=None):
+    """
+    One page of archived alerts, newest first, after `cursor`.
+    Returns (alerts, next_cursor); next_cursor is None on the last page.
+    """
+    page_size = min(page_size or _max_active(), _max_active())
+    query = {}
+    position = decode_cursor(cursor)
+    if position is not None:
+        timestamp, alert_id = position
+        query = {'$or': [
+            {'timestamp': {'$lt': timestamp}},
+            {'timestamp': timestamp, '_id': {'$lt': alert_id}},
+        ]}
+    # Fetch one extra document to know whether there is a next page without a count
+    page = list(
+        _collection(ARCHIVE_COLLECTION).find(query, LIST_FIELDS)
+        .sort([('timestamp', DESCENDING), ('_id', DESCENDING)]).limit(page_size + 1)
+    )
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, encode_cursor(page[-1])
+    return page, None
+
+
+# --- Writes ---
+
+def default_expiry(timestamp):
+    return timestamp + datetime.timedelta(hours=getattr(settings, 'ALERTS_DEFAULT_LIFETIME_HOURS', 72))
+
+
+def _move_to_archive(alerts, now):
+    """Copy `alerts` into the archive, then remove them from the live collection."""
+    for alert in alerts:
+        alert['archived_at'] = now
+    # Upserts keep this safe to repeat if a previous run stopped between the two steps
+    _collection(ARCHIVE_COLLECTION).bulk_write(
+        [ReplaceOne({'_id': alert['_id']}, alert, upsert=True) for alert in alerts],
+        ordered=False,
+    )
+    _collection().delete_many({'_id': {'$in': [alert['_id'] for alert in alerts]}})
+
+
+def insert_alert(alert_data):
+    """
+    Store a new alert document, invalidate cached reads and return its id.
+    `timestamp` and `expires_at` default to now and now + the default lifetime.
+    An alert posted inactive goes straight to the archive.
+    """
+    now = timezone.now()
+    alert_data.setdefault('timestamp', now)
+    alert_data.setdefault('expires_at', default_expiry(alert_data['timestamp']))
+    if alert_data.get('is_active'):
+        inserted_id = _collection().insert_one(alert_data).inserted_id
+        archive_alerts()
+    else:
+        alert_data['archived_at'] = now
+        inserted_id = _collection(ARCHIVE_COLLECTION).insert_one(alert_data).inserted_id
+    bump_version()
+    publish('alert.posted', alert_payload(alert_data))
+    return inserted_id
+
+
+def deactivate_alert(alert_id):
+    """Deactivate an alert and archive it. Returns False if no such active alert."""
+    alert = _collection().find_one_and_update(
+        {'_id': alert_id, 'is_active': True},
+        {'$set': {'is_active': False}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if alert is None:
+        return False
+    _move_to_archive([alert], timezone.now())
+    bump_version()
+    return True
+
+
+def archive_alerts(batch_size=500):
+    """Move inactive and expired alerts to the archive, `batch_size` at a time. Returns how many moved."""
+    live = _collection()
+    now = timezone.now()
+    moved = 0
+    while True:
+        batch = list(live.find({'$or': [{'is_active': False}, {'expires_at': {'$lte': now}}]}).limit(batch_size))
+        if not batch:
+            break
+        _move_to_archive(batch, now)
+        moved += len(batch)
+    if moved:
+        bump_version()
+    return moved
+
+
+def backfill_expiry(batch_size=500):
+    """Give alerts posted before expiry existed an `expires_at`. Returns how many were updated."""
+    live = _collection()
+    updated = 0
+    while True:
+        batch = list(live.find({'expires_at': {'$exists': False}}, {'timestamp': 1}).limit(batch_size))
+        if not batch:
+            break
+        live.bulk_write([
+            UpdateOne(
+                {'_id': alert['_id']},
+                {'$set': {'expires_at': default_expiry(alert.get('timestamp') or timezone.now())}},
+            )
+            for alert in batch
+        ], ordered=False)
+        updated += len(batch)
+    if updated:
+        bump_version()
+    return updated
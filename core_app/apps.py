@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_app'
+
+    def ready(self):
+        from django.contrib.auth.models import update_last_login
+        from django.contrib.auth.signals import user_logged_in
+
+        from .models import update_last_login_throttled
+
+        # Replace django.contrib.auth's receiver (connected in its own ready(), which runs first)
+        user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+        user_logged_in.connect(update_last_login_throttled, dispatch_uid='update_last_login')
@@ -0,0 +1,88 @@
+# core_app/archive.py
+"""
+Hot/archive split for relief requests.
+
+Completed and Cancelled requests untouched for REQUEST_ARCHIVE_AFTER_DAYS are
+moved from the live ReliefRequest table to ArchivedReliefRequest by
+`manage.py archive_requests`. The live table, and with it every operational
+query (dashboards, assignment, dedup, maps, active-task counts), then only
+holds open and recently closed requests. Victim history and exports read both
+tables.
+
+Requests move in batches of `batch_size`, each in its own transaction: a
+batch is copied (with its co-requesters) and deleted from the live table
+together, so the command can be stopped at any point and simply re-run.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedReliefRequest, ReliefRequest
+
+ARCHIVE_FIELDS = [
+    'id', 'requester_id', 'request_type', 'description', 'latitude', 'longitude', 'status',
+    'assigned_to_volunteer_id', 'created_at', 'updated_at', 'geohash', 'report_count',
+]
+
+
+def archivable_requests(older_than_days=None):
+    """Closed requests last updated more than `older_than_days` (default REQUEST_ARCHIVE_AFTER_DAYS) ago."""
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'REQUEST_ARCHIVE_AFTER_DAYS', 30)
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    return ReliefRequest.objects.filter(status__in=ReliefRequest.CLOSED_STATUSES, updated_at__lt=cutoff)
+
+
+def archive_closed_requests(older_than_days=None, batch_size=1000, dry_run=False):
+    """Move archivable requests to the archive table. Returns how many moved (or would move)."""
+    candidates = archivable_requests(older_than_days)
+    if dry_run:
+        return candidates.count()
+
+    live_links = ReliefRequest.co_requesters.through
+    archived_links = ArchivedReliefRequest.co_requesters.through
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                candidates.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            ArchivedReliefRequest.objects.bulk_create([ArchivedReliefRequest(**row) for row in rows])
+            archived_links.objects.bulk_create([
+                archived_links(archivedreliefrequest_id=request_id, user_id=user_id)
+                for request_id, user_id in live_links.objects.filter(reliefrequest_id__in=ids)
+                .values_list('reliefrequest_id', 'user_id')
+            ])
+            # Also drops the request's co-requester links and finished assignment jobs
+            ReliefRequest.objects.filter(id__in=ids).delete()
+        moved += len(rows)
+    return moved
+
+
+def _newest_first(*querysets):
+    rows = [row for queryset in querysets for row in queryset]
+    rows.sort(key=lambda row: row.created_at, reverse=True)
+    return rows
+
+
+def request_history(user):
+    """
+    (own requests, requests the user was added to as a duplicate reporter),
+    each newest first, from both the live and the archive table.
+    """
+    own = _newest_first(
+        user.submitted_requests.select_related('assigned_to_volunteer').order_by('-created_at'),
+        user.archived_requests.select_related('assigned_to_volunteer').order_by('-created_at'),
+    )
+    linked = _newest_first(
+        user.joined_requests.select_related('assigned_to_volunteer').order_by('-created_at'),
+        user.joined_archived_requests.select_related('assigned_to_volunteer').order_by('-created_at'),
+    )
+    return own, linked
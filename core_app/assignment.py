@@ -0,0 +1,373 @@
+# core_app/assignment.py
+"""
+Batch auto-assignment of every Pending relief request at once.
+
+Assigning requests one by one with choose_best_volunteer() is greedy: an early
+request can take the volunteer who was the only good fit for a later one.
+Here all Pending requests and all volunteers with spare capacity are loaded
+once and matched together by minimising total cost, where
+
+    cost = distance (km)
+         + BATCH_ASSIGN_SKILL_PENALTY_KM  if the volunteer's skills don't match
+         + BATCH_ASSIGN_ROLE_PENALTY_KM   if the staff member isn't a volunteer
+         + BATCH_ASSIGN_LOAD_PENALTY_KM   per task the volunteer already has
+
+Only plausible pairs are costed. Each request gets the volunteers found by the
+same geohash-cell search single assignment uses: widening from
+VOLUNTEER_SEARCH_RADIUS_KM until VOLUNTEER_SEARCH_K free volunteers turn up or
+VOLUNTEER_SEARCH_MAX_RADIUS_KM is reached. If that finds nobody, the request
+gets the nearest volunteers and those without a location instead. The result
+is a sparse graph of about requests x K edges rather than a dense
+requests x volunteers matrix. SciPy's min_weight_full_bipartite_matching
+solves it optimally when SciPy is installed; otherwise a greedy
+cheapest-edge-first matching is used.
+
+The plan is computed without holding any locks. Only applying it takes row
+locks: the planned requests still Pending (SKIP LOCKED) and the planned
+volunteers' profiles, whose capacity is re-checked. The dashboard runs all this
+as a queued job (see core_app/jobs.py), not inside the HTTP request.
+
+bulk_update_requests() applies a single status (and assignee) change to many
+requests at once, for the admin's bulk actions.
+"""
+import functools
+from math import floor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from . import clusters, nearby
+from .events import publish, request_payload
+from .geo import GEOHASH_PRECISION, KM_PER_DEGREE_LAT, cell_size
+from .metrics import timed
+from .skills import skill_bit
+from .models import Profile, ReliefRequest
+from .services import (
+    NO_LOCATION_DISTANCE_KM,
+    distance_array,
+    eligible_volunteers,
+    np,
+)
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+except ImportError:  # scipy is optional; fall back to greedy matching
+    min_weight_full_bipartite_matching = None
+
+
+class _VolunteerIndex:
+    """
+    Volunteers with free slots, bucketed by geohash cell. A cell at precision p
+    is one square of the cell_size(p) grid, so cells are addressed by integer
+    (row, col) and computed for every volunteer at once.
+    """
+
+    def __init__(self, volunteers, max_active_tasks):
+        self.volunteers = [
+            v for v in volunteers
+            if getattr(v, 'profile', None) is not None and v.active_tasks < max_active_tasks
+        ]
+        located = [
+            i for i, v in enumerate(self.volunteers)
+            if v.profile.latitude is not None and v.profile.longitude is not None
+        ]
+        self.located = np.array(located, dtype=np.int64)
+        self.unlocated = sorted(set(range(len(self.volunteers))) - set(located))
+        self.points = np.array(
+            [(float(self.volunteers[i].profile.latitude), float(self.volunteers[i].profile.longitude))
+             for i in located],
+            dtype=float,
+        ).reshape(-1, 2)
+        self._buckets = {}  # precision -> {(row, col): positions in self.located}
+
+    def _cells(self, precision):
+        buckets = self._buckets.get(precision)
+        if buckets is None:
+            h, w = cell_size(precision)
+            rows = np.floor((self.points[:, 0] + 90.0) / h).astype(np.int64)
+            cols = np.floor((self.points[:, 1] + 180.0) / w).astype(np.int64)
+            buckets = {}
+            for position, key in enumerate(zip(rows.tolist(), cols.tolist())):
+                buckets.setdefault(key, []).append(position)
+            self._buckets[precision] = buckets
+        return buckets
+
+    def near(self, lat, lon, precision):
+        """Positions (into self.located) of volunteers in the 3x3 block of cells around (lat, lon)."""
+        h, w = cell_size(precision)
+        row, col = floor((lat + 90.0) / h), floor((lon + 180.0) / w)
+        buckets = self._cells(precision)
+        found = []
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                found.extend(buckets.get((row + dr, col + dc), ()))
+        return np.array(found, dtype=np.int64)
+
+
+def _search_precisions():
+    """Geohash precisions to try, finest first: from VOLUNTEER_SEARCH_RADIUS_KM to VOLUNTEER_SEARCH_MAX_RADIUS_KM."""
+    radius = getattr(settings, 'VOLUNTEER_SEARCH_RADIUS_KM', 5)
+    max_radius = getattr(settings, 'VOLUNTEER_SEARCH_MAX_RADIUS_KM', 200)
+    precisions = []
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        # A 3x3 block reaches at least one cell height in every direction
+        reach = cell_size(precision)[0] * KM_PER_DEGREE_LAT
+        if reach >= radius:
+            precisions.append(precision)
+        if reach >= max_radius:
+            break
+    return precisions
+
+
+def _candidates(relief_request, index, precisions, k):
+    """[(volunteer index, distance km or None)] worth costing for `relief_request`: its k nearest found."""
+    lat, lon = float(relief_request.latitude), float(relief_request.longitude)
+    found = np.empty(0, dtype=np.int64)
+    for precision in precisions:
+        found = index.near(lat, lon, precision)
+        if len(found) >= k:
+            break
+    if not len(found):
+        # Nobody within the search radius: the nearest anywhere, and those without a location
+        found = np.arange(len(index.located))
+        extra = [(i, None) for i in index.unlocated[:k]]
+    else:
+        extra = []
+    if not len(found):
+        return extra
+    distances = distance_array([(lat, lon)], index.points[found])[0]
+    nearest = np.argsort(distances, kind='stable')[:k]
+    return list(zip(index.located[found[nearest]].tolist(), distances[nearest].tolist())) + extra
+
+
+def _edges(requests, index, max_active_tasks):
+    """
+    Sparse cost graph: parallel lists of request row, slot column, cost and
+    distance, plus the slots as (volunteer, load before this task).
+    """
+    skill_penalty = getattr(settings, 'BATCH_ASSIGN_SKILL_PENALTY_KM', 50)
+    role_penalty = getattr(settings, 'BATCH_ASSIGN_ROLE_PENALTY_KM', 100)
+    load_penalty = getattr(settings, 'BATCH_ASSIGN_LOAD_PENALTY_KM', 10)
+
+    # One column per free task slot of each volunteer
+    slots, first_slot = [], []
+    for volunteer in index.volunteers:
+        first_slot.append(len(slots))
+        slots.extend((volunteer, load) for load in range(volunteer.active_tasks, max_active_tasks))
+
+    precisions = _search_precisions()
+    k = getattr(settings, 'VOLUNTEER_SEARCH_K', 20)
+    rows, cols, costs, distances = [], [], [], []
+    for r, relief_request in enumerate(requests):
+        bit = skill_bit(relief_request.request_type)
+        for i, distance in _candidates(relief_request, index, precisions, k):
+            volunteer = index.volunteers[i]
+            base = (
+                (NO_LOCATION_DISTANCE_KM if distance is None else distance)
+                + role_penalty * volunteer.is_volunteer_role
+                + skill_penalty * (not bit & volunteer.profile.skill_tags)
+            )
+            for c in range(first_slot[i], first_slot[i] + max_active_tasks - volunteer.active_tasks):
+                rows.append(r)
+                cols.append(c)
+                costs.append(base + load_penalty * slots[c][1])
+                distances.append(distance)
+    return rows, cols, costs, distances, slots
+
+
+def _sparse_matching(n_rows, n_cols, rows, cols, costs):
+    """
+    Min-cost matching; every row also gets a private 'unassigned' column costing
+    just more than any edge. So a request is only left unassigned when
+    assigning it would push other requests onto costlier volunteers by more
+    than that. A higher 'unassigned' cost assigns slightly more requests, but
+    the solver gets several times slower.
+    """
+    unassigned_cost = max(costs) + 1
+    graph = csr_matrix(
+        (
+            # +1 keeps zero-cost edges from being read as missing
+            np.concatenate([np.asarray(costs, dtype=float) + 1, np.full(n_rows, unassigned_cost + 1)]),
+            (np.concatenate([rows, np.arange(n_rows)]), np.concatenate([cols, n_cols + np.arange(n_rows)])),
+        ),
+        shape=(n_rows, n_cols + n_rows),
+    )
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+    real = matched_cols < n_cols
+    return matched_rows[real].tolist(), matched_cols[real].tolist()
+
+
+def _greedy_matching(rows, cols, costs):
+    """Cheapest edge first; each row and column used at most once."""
+    used_rows, used_cols = set(), set()
+    matched_rows, matched_cols = [], []
+    for e in sorted(range(len(costs)), key=costs.__getitem__):
+        if rows[e] in used_rows or cols[e] in used_cols:
+            continue
+        used_rows.add(rows[e])
+        used_cols.add(cols[e])
+        matched_rows.append(rows[e])
+        matched_cols.append(cols[e])
+    return matched_rows, matched_cols
+
+
+def plan_assignments(requests, volunteers, max_active_tasks=1):
+    """
+    Match requests to volunteers. Returns a list of (request, volunteer, distance_km),
+    distance being None when the volunteer has no location.
+    """
+    if np is None:
+        raise ImproperlyConfigured("Batch assignment requires NumPy.")
+
+    index = _VolunteerIndex(volunteers, max_active_tasks)
+    if not requests or not index.volunteers:
+        return []
+
+    rows, cols, costs, distances, slots = _edges(requests, index, max_active_tasks)
+    if not costs:
+        return []
+    if min_weight_full_bipartite_matching is not None:
+        matched_rows, matched_cols = _sparse_matching(len(requests), len(slots), rows, cols, costs)
+    else:
+        matched_rows, matched_cols = _greedy_matching(rows, cols, costs)
+
+    distance_of = dict(zip(zip(rows, cols), distances))
+    return [
+        (requests[r], slots[c][0], distance_of[r, c])
+        for r, c in zip(matched_rows, matched_cols)
+    ]
+
+
+@timed('batch_assignment')
+def run_batch_assignment(max_active_tasks=1, dry_run=False):
+    """
+    Assign every Pending request, planning first and locking only to apply.
+
+    The plan is computed from an unlocked read. Applying it locks the planned
+    requests that are still Pending (SKIP LOCKED, so requests being assigned
+    elsewhere right now are left out) and the planned volunteers' profiles,
+    and skips any pair whose request or volunteer was taken in the meantime.
+    Returns a report dict with the assignments made and the request ids left Pending.
+    """
+    requests = list(
+        ReliefRequest.objects.filter(status='Pending')
+        .select_related('requester')
+        .only(
+            'id', 'request_type', 'latitude', 'longitude', 'status',
+            'assigned_to_volunteer', 'created_at', 'requester__username',
+        )
+        .order_by('created_at', 'id')
+    )
+    volunteers = list(eligible_volunteers())
+    plan = plan_assignments(requests, volunteers, max_active_tasks)
+
+    if not dry_run and plan:
+        with transaction.atomic():
+            still_pending = set(
+                ReliefRequest.objects.select_for_update(skip_locked=True)
+                .filter(id__in=[r.id for r, _, _ in plan], status='Pending')
+                .values_list('id', flat=True)
+            )
+            # Profiles in id order, so concurrent appliers can't deadlock
+            free = {
+                user_id: max_active_tasks - count
+                for user_id, count in Profile.objects.select_for_update()
+                .filter(user_id__in={v.id for _, v, _ in plan})
+                .order_by('id')
+                .values_list('user_id', 'active_task_count')
+            }
+            applied = []
+            for relief_request, volunteer, distance in plan:
+                if relief_request.id in still_pending and free.get(volunteer.id, 0) > 0:
+                    free[volunteer.id] -= 1
+                    applied.append((relief_request, volunteer, distance))
+            plan = applied
+
+            now = timezone.now()
+            for relief_request, volunteer, _ in plan:
+                relief_request.assigned_to_volunteer = volunteer
+                relief_request.status = 'Assigned'
+                relief_request.updated_at = now
+            ReliefRequest.objects.bulk_update(
+                [relief_request for relief_request, _, _ in plan],
+                ['assigned_to_volunteer', 'status', 'updated_at'],
+                batch_size=1000,
+            )
+            # Every planned request goes Pending -> Assigned, so each volunteer gains one task per request
+            deltas = {}
+            for _, volunteer, _ in plan:
+                deltas[volunteer.id] = deltas.get(volunteer.id, 0) + 1
+            Profile.adjust_active_task_counts(deltas)
+            # bulk_update sends no post_save signals, so publish the changes here
+            for relief_request, _, _ in plan:
+                publish('request.assigned', functools.partial(request_payload, relief_request))
+            # ...and evict the map tiles and nearest-request lists still showing them as Pending
+            points = [(r.latitude, r.longitude) for r, _, _ in plan]
+            transaction.on_commit(lambda: (clusters.invalidate_points(points), nearby.invalidate_points(points)))
+
+    assigned_ids = {relief_request.id for relief_request, _, _ in plan}
+    return {
+        'pending': len(requests),
+        'volunteers': len(volunteers),
+        'assigned': [
+            {
+                'request_id': relief_request.id,
+                'volunteer': volunteer.username,
+                'distance_km': None if distance is None else round(distance, 2),
+            }
+            for relief_request, volunteer, distance in plan
+        ],
+        'unassigned': [r.id for r in requests if r.id not in assigned_ids],
+        'dry_run': dry_run,
+    }
+
+
+_UNCHANGED = object()
+
+
+def bulk_update_requests(queryset, status, volunteer=_UNCHANGED):
+    """
+    Set `status` (and `volunteer` as assignee, if given) on every request in
+    `queryset` with one UPDATE. Active task counts, live dashboard events and
+    spatial caches are kept in step, as ReliefRequest.save() would. Returns
+    the number of requests changed.
+    """
+    with transaction.atomic():
+        requests = list(
+            queryset.select_for_update(of=('self',))
+            .select_related('requester', 'assigned_to_volunteer')
+            .only(
+                'id', 'request_type', 'latitude', 'longitude', 'status', 'created_at',
+                'requester__username', 'assigned_to_volunteer__username',
+            )
+        )
+        if not requests:
+            return 0
+
+        now = timezone.now()
+        changes = {'status': status, 'updated_at': now}
+        if volunteer is not _UNCHANGED:
+            changes['assigned_to_volunteer'] = volunteer
+        deltas = {}
+        for relief_request in requests:
+            before = relief_request.assigned_to_volunteer_id
+            if before is not None and relief_request.status in ReliefRequest.ACTIVE_STATUSES:
+                deltas[before] = deltas.get(before, 0) - 1
+            for name, value in changes.items():
+                setattr(relief_request, name, value)
+            after = relief_request.assigned_to_volunteer_id
+            if after is not None and status in ReliefRequest.ACTIVE_STATUSES:
+                deltas[after] = deltas.get(after, 0) + 1
+
+        ReliefRequest.objects.filter(pk__in=[r.pk for r in requests]).update(**changes)
+        Profile.adjust_active_task_counts(deltas)
+        # update() sends no post_save signals, so publish and evict here
+        event_type = 'request.status' if volunteer is _UNCHANGED else 'request.assigned'
+        for relief_request in requests:
+            publish(event_type, functools.partial(request_payload, relief_request))
+        points = [(r.latitude, r.longitude) for r in requests]
+        transaction.on_commit(lambda: (clusters.invalidate_points(points), nearby.invalidate_points(points)))
+    return len(requests)
@@ -0,0 +1,20 @@
+# core_app/cacheversion.py
+"""
+Version counters kept in a Django cache.
+
+Cached reads (alerts, nearby regions) store the version they were built
+under; bumping the counter makes every older entry a miss without having to
+find and delete them.
+"""
+import time
+
+
+def bump(cache, key):
+    """Increment the version counter `key` in `cache` and return the new value."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Never set or evicted; any new value differs from what entries recorded
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
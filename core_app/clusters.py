@@ -0,0 +1,138 @@
+# core_app/clusters.py
+"""
+Clustered relief-request counts for map tiles.
+
+Maps request standard slippy-map tiles (z/x/y). Each tile is answered with one
+SQL GROUP BY over a prefix of ReliefRequest.geohash - every geohash prefix is a
+grid cell - broken down by request_type and status. The prefix length grows
+with the zoom level so a tile holds roughly MAP_CLUSTER_CELLS_PER_TILE cells
+across, keeping responses small however many requests there are.
+
+Tiles are cached in MAP_CLUSTER_CACHE_ALIAS. When a request is created, moved,
+re-typed, changes status or is deleted, the one tile per zoom level containing
+its old and new position is evicted; MAP_CLUSTER_CACHE_TTL bounds staleness
+for caches that are not shared between workers.
+"""
+from math import asinh, atan, degrees, floor, pi, radians, sinh, tan
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Count
+from django.db.models.functions import Substr
+
+from .geo import GEOHASH_PRECISION, cell_size, cells_filter
+
+MAX_LATITUDE = 85.05112878  # Web Mercator limit
+
+
+def _cache():
+    return caches[getattr(settings, 'MAP_CLUSTER_CACHE_ALIAS', 'default')]
+
+
+def max_zoom():
+    return getattr(settings, 'MAP_MAX_ZOOM', 18)
+
+
+def tile_bounds(z, x, y):
+    """(min_lat, max_lat, min_lon, max_lon) of slippy-map tile z/x/y."""
+    n = 2 ** z
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = degrees(atan(sinh(pi * (1 - 2 * y / n))))
+    min_lat = degrees(atan(sinh(pi * (1 - 2 * (y + 1) / n))))
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def tile_for(lat, lon, z):
+    """(x, y) of the zoom-`z` tile containing (lat, lon)."""
+    n = 2 ** z
+    lat = max(min(float(lat), MAX_LATITUDE), -MAX_LATITUDE)
+    x = floor((float(lon) + 180.0) / 360.0 * n)
+    y = floor((1 - asinh(tan(radians(lat))) / pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def cluster_precision(z):
+    """Longest geohash prefix whose cells are at least 1/MAP_CLUSTER_CELLS_PER_TILE of a tile wide."""
+    cells_per_tile = getattr(settings, 'MAP_CLUSTER_CELLS_PER_TILE', 8)
+    min_width = 360.0 / (2 ** z) / cells_per_tile
+    precision = 1
+    while precision < GEOHASH_PRECISION and cell_size(precision + 1)[1] >= min_width:
+        precision += 1
+    return precision
+
+
+def _cache_key(z, x, y, include_closed):
+    return f"map:tile:{z}:{x}:{y}:{int(include_closed)}"
+
+
+def _aggregate(z, x, y, include_closed):
+    from .models import ReliefRequest
+
+    min_lat, max_lat, min_lon, max_lon = bbox = tile_bounds(z, x, y)
+    precision = cluster_precision(z)
+
+    queryset = ReliefRequest.objects.filter(
+        cells_filter(bbox),
+        latitude__gte=min_lat, latitude__lt=max_lat,
+        longitude__gte=min_lon, longitude__lt=max_lon,
+    )
+    if not include_closed:
+        queryset = queryset.exclude(status__in=ReliefRequest.CLOSED_STATUSES)
+
+    rows = (
+        queryset.annotate(cell=Substr('geohash', 1, precision))
+        .values('cell', 'request_type', 'status')
+        .annotate(n=Count('id'), lat=Avg('latitude'), lon=Avg('longitude'))
+        .order_by()
+    )
+
+    clusters = {}
+    for row in rows:
+        cluster = clusters.setdefault(row['cell'], {
+            'cell': row['cell'], 'count': 0, 'lat': 0.0, 'lon': 0.0,
+            'by_type': {}, 'by_status': {},
+        })
+        n = row['n']
+        cluster['count'] += n
+        # Weighted sums for now; divided into the centroid below
+        cluster['lat'] += float(row['lat']) * n
+        cluster['lon'] += float(row['lon']) * n
+        cluster['by_type'][row['request_type']] = cluster['by_type'].get(row['request_type'], 0) + n
+        cluster['by_status'][row['status']] = cluster['by_status'].get(row['status'], 0) + n
+
+    for cluster in clusters.values():
+        cluster['lat'] = round(cluster['lat'] / cluster['count'], 6)
+        cluster['lon'] = round(cluster['lon'] / cluster['count'], 6)
+
+    return {
+        'z': z, 'x': x, 'y': y,
+        'precision': precision,
+        'total': sum(c['count'] for c in clusters.values()),
+        'clusters': sorted(clusters.values(), key=lambda c: c['cell']),
+    }
+
+
+def tile_clusters(z, x, y, include_closed=False):
+    """Cluster counts for tile z/x/y, from the cache when possible."""
+    key = _cache_key(z, x, y, include_closed)
+    cache = _cache()
+    result = cache.get(key)
+    if result is None:
+        result = _aggregate(z, x, y, include_closed)
+        cache.set(key, result, getattr(settings, 'MAP_CLUSTER_CACHE_TTL', 300))
+    return result
+
+
+def invalidate_points(points):
+    """Evict every cached tile, at every zoom level, containing one of `points` (lat, lon)."""
+    keys = set()
+    for lat, lon in points:
+        if lat is None or lon is None:
+            continue
+        for z in range(max_zoom() + 1):
+            x, y = tile_for(lat, lon, z)
+            keys.add(_cache_key(z, x, y, False))
+            keys.add(_cache_key(z, x, y, True))
+    if keys:
+        _cache().delete_many(list(keys))
@@ -0,0 +1,159 @@
+# core_app/db_router.py
+"""
+Read-replica routing.
+
+Every write, and every query that takes row locks (select_for_update,
+get_or_create, ...), goes to the primary (`default`). Other reads go to one of
+the aliases in DATABASE_REPLICAS, picked once per request. A request reads
+from the primary instead when:
+
+  * it is not a GET/HEAD/OPTIONS: reads before a write must see current rows;
+  * a transaction is open on the primary, so reads inside it stay consistent
+    with its writes (e.g. the assignment worker's candidate scan);
+  * the user wrote something in the last REPLICA_STICKY_SECONDS: a write sets
+    a short-lived cookie, so the page after "submit" shows the new request
+    even if the replica is still catching up;
+  * code asked for it with `with primary():`.
+
+With DATABASE_REPLICAS empty every query goes to `default`, as before.
+
+Trying it locally with two SQLite files:
+
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+run `manage.py migrate` (it only touches `default`) and copy the primary file
+over replica.sqlite3 whenever the "replica" should catch up.
+"""
+import contextlib
+import contextvars
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary_until'
+
+# Per request (or task): whether reads are pinned to the primary, and the replica picked
+_pinned = contextvars.ContextVar('db_pinned', default=False)
+_replica = contextvars.ContextVar('db_replica', default=None)
+_wrote = contextvars.ContextVar('db_wrote', default=None)
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextlib.contextmanager
+def primary():
+    """Send every read inside the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """Database router: writes to the primary, reads to a replica when that is safe."""
+
+    def db_for_read(self, model, **hints):
+        available = replicas()
+        if not available or _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return _replica.get() or random.choice(available)
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote[0] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema by replication, never by migrate
+        return db not in replicas()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides per request whether reads may use a replica, and sets the sticky
+    cookie after a request that wrote to the primary.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        available = replicas()
+        if not available:
+            return self.get_response(request)
+
+        wrote, tokens = self._route(request, available)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._reset(tokens)
+        return self._stick(request, response, wrote)
+
+    async def __acall__(self, request):
+        # Sync views run via sync_to_async, which copies this context into the worker thread
+        available = replicas()
+        if not available:
+            return await self.get_response(request)
+
+        wrote, tokens = self._route(request, available)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._reset(tokens)
+        return self._stick(request, response, wrote)
+
+    def _route(self, request, available):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        wrote = [False]
+        tokens = (
+            _pinned.set(request.method not in self.SAFE_METHODS or pinned_until > time.time()),
+            _replica.set(random.choice(available)),
+            _wrote.set(wrote),
+        )
+        return wrote, tokens
+
+    @staticmethod
+    def _reset(tokens):
+        for var, token in zip((_pinned, _replica, _wrote), tokens):
+            var.reset(token)
+
+    @staticmethod
+    def _stick(request, response, wrote):
+        if wrote[0]:
+            sticky = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + sticky)), max_age=sticky,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
@@ -0,0 +1,152 @@
+# core_app/dedup.py
+"""
+Duplicate detection for newly submitted relief requests.
+
+During a surge the same family often submits the same request several times,
+and neighbours report the same spot. Before a new request is saved we look
+for an open request of the same type within DUPLICATE_REQUEST_RADIUS_KM that
+was submitted in the last DUPLICATE_REQUEST_WINDOW_MINUTES:
+
+  - same requester: the submission is merged into the existing request
+    (report_count goes up, a new description is appended);
+  - another requester: they are linked to the existing request as a
+    co-requester, so it shows on their dashboard and is handled once; their
+    description and location are appended to it.
+
+The lookup only reads the few geohash cells around the point (indexed on
+request_type + geohash), so its cost doesn't grow with the open queue.
+
+Concurrent submissions of one type at one spot are serialised, so two copies
+of the same request arriving together can't both be created: on PostgreSQL
+with transaction-scoped advisory locks on the geohash cells around the point,
+elsewhere by locking the candidate rows. The merged description is built in
+the UPDATE itself.
+"""
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .geo import GEOHASH_PRECISION, KM_PER_DEGREE_LAT, bounding_box, cell_size, cells_filter, cells_in_bbox
+from .models import ReliefRequest
+from .services import calculate_distance
+
+
+def _radius_km():
+    return getattr(settings, 'DUPLICATE_REQUEST_RADIUS_KM', 0.2)
+
+
+def _lock_precision(radius_km):
+    """Finest geohash precision whose cells are at least a duplicate search box tall."""
+    precision = 1
+    while precision < GEOHASH_PRECISION and cell_size(precision + 1)[0] * KM_PER_DEGREE_LAT >= 2 * radius_km:
+        precision += 1
+    return precision
+
+
+def _lock_key(request_type, cell):
+    """Signed 64-bit advisory lock key for duplicate checks of `request_type` in `cell`."""
+    digest = hashlib.blake2b(f'dedup:{request_type}:{cell}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def _lock_area(request_type, bbox):
+    """
+    Hold PostgreSQL advisory locks on the (request_type, cell) pairs around `bbox`
+    until the transaction ends. The precision depends only on the radius setting,
+    so submissions near each other always share at least one lock.
+    """
+    precision = _lock_precision(_radius_km())
+    keys = sorted(_lock_key(request_type, cell) for cell in cells_in_bbox(bbox, precision))
+    with connection.cursor() as cursor:
+        for key in keys:  # always in the same order, so lockers can't deadlock
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+
+
+def find_duplicate(relief_request, lock=False):
+    """
+    The nearest open request duplicating the unsaved `relief_request`, or None.
+    With `lock` (inside a transaction), later submissions near the same point
+    wait until this transaction ends.
+    """
+    radius_km = _radius_km()
+    window = getattr(settings, 'DUPLICATE_REQUEST_WINDOW_MINUTES', 120)
+    if radius_km <= 0 or window <= 0:
+        return None
+    lat, lon = relief_request.latitude, relief_request.longitude
+    if lat is None or lon is None:
+        return None
+
+    min_lat, max_lat, min_lon, max_lon = bbox = bounding_box(lat, lon, radius_km)
+    area_lock = lock and connection.vendor == 'postgresql'
+    if area_lock:
+        _lock_area(relief_request.request_type, bbox)
+    candidates = (
+        ReliefRequest.objects.filter(
+            cells_filter(bbox, max_cells=9),
+            request_type=relief_request.request_type,
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lon, max_lon),
+            created_at__gte=timezone.now() - datetime.timedelta(minutes=window),
+        )
+        .exclude(status__in=ReliefRequest.CLOSED_STATUSES)
+        .only('id', 'requester_id', 'latitude', 'longitude')
+    )
+    if lock and not area_lock:
+        candidates = candidates.select_for_update()
+
+    best, best_distance = None, None
+    for candidate in candidates:
+        distance = calculate_distance(lat, lon, candidate.latitude, candidate.longitude)
+        if distance <= radius_km and (best is None or distance < best_distance):
+            best, best_distance = candidate, distance
+    return best
+
+
+def submit_request(relief_request):
+    """
+    Save a new request unless it duplicates an open one.
+
+    Returns (request, outcome) where outcome is 'created', 'merged' (the
+    requester's own earlier request) or 'linked' (someone else's).
+    """
+    with transaction.atomic():
+        duplicate = find_duplicate(relief_request, lock=True)
+        if duplicate is None:
+            relief_request.save()
+            return relief_request, 'created'
+
+        changes = {'updated_at': timezone.now()}
+        description = relief_request.description.strip()
+        if duplicate.requester_id == relief_request.requester_id:
+            outcome = 'merged'
+            changes['report_count'] = F('report_count') + 1
+            # Re-sending the same text adds nothing
+            report, known = f"[Also reported] {description}", description
+        else:
+            outcome = 'linked'
+            if not duplicate.co_requesters.filter(pk=relief_request.requester_id).exists():
+                duplicate.co_requesters.add(relief_request.requester_id)
+                changes['report_count'] = F('report_count') + 1
+            # Keep the field report: who saw it, where, and what they said
+            report = (
+                f"[Also reported by {relief_request.requester.username} at "
+                f"{float(relief_request.latitude):.6f}, {float(relief_request.longitude):.6f}] {description}"
+            ).rstrip()
+            known = report
+
+        if known:
+            # Appended in SQL, so concurrent reports can't overwrite each other's text
+            text_field = ReliefRequest._meta.get_field('description')
+            changes['description'] = Case(
+                When(description__contains=known, then=F('description')),
+                default=Concat(F('description'), Value(f"\n\n{report}"), output_field=text_field),
+                output_field=text_field,
+            )
+        ReliefRequest.objects.filter(pk=duplicate.pk).update(**changes)
+        duplicate.refresh_from_db(fields=['description', 'report_count'])
+        return duplicate, outcome
@@ -0,0 +1,258 @@
+# core_app/events.py
+"""
+In-process fan-out hub for the live dashboard feed (server-sent events).
+
+Views and signal handlers call publish() from ordinary synchronous code. Each
+connected client is an asyncio.Queue living on the ASGI event loop, so idle
+connections cost a queue and a suspended coroutine, not a thread.
+
+By default events only reach clients connected to the process that published
+them. Changes made elsewhere - by assignment_worker processes, or on other
+ASGI workers - need LIVE_EVENTS_BROKER = 'mongo': publish() then also writes
+each event to a small capped MongoDB collection, and every process serving
+the feed tails it with a background thread and hands events from other
+processes to its own hub.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class EventHub:
+    def __init__(self, history=256, queue_size=100):
+        self._subscribers = set()  # (loop, queue) pairs
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._queue_size = queue_size
+
+    def publish(self, event_type, data):
+        """Send an event to every subscriber. Safe to call from any thread."""
+        with self._lock:
+            event = {'id': next(self._ids), 'event': event_type, 'data': data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:  # event loop closed
+                with self._lock:
+                    self._subscribers.discard((loop, queue))
+        return event
+
+    @staticmethod
+    def _offer(queue, event):
+        # A slow client loses its oldest events rather than blocking publishers
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a client and return its Subscription. Must be called from the
+        event loop that will consume it. Buffered events newer than
+        `last_event_id` are replayed first.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.add((loop, queue))
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        self._offer(queue, event)
+        return Subscription(self, loop, queue)
+
+    def _unsubscribe(self, loop, queue):
+        with self._lock:
+            self._subscribers.discard((loop, queue))
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+class Subscription:
+    """One client's queue on the hub; read with next_event() and close() when done."""
+
+    def __init__(self, hub, loop, queue):
+        self._hub = hub
+        self._loop = loop
+        self._queue = queue
+
+    async def next_event(self, timeout=None):
+        """The next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._hub._unsubscribe(self._loop, self._queue)
+
+
+hub = EventHub(
+    history=getattr(settings, 'LIVE_EVENTS_HISTORY', 256),
+    queue_size=getattr(settings, 'LIVE_EVENTS_QUEUE_SIZE', 100),
+)
+
+
+def enabled():
+    return getattr(settings, 'LIVE_EVENTS_ENABLED', False)
+
+
+def publish(event_type, data):
+    """
+    Publish once the current transaction commits (immediately outside one).
+    Does nothing while LIVE_EVENTS_ENABLED is off. `data` may be a callable
+    returning the payload, so any queries it needs only run at commit time.
+    """
+    if not enabled():
+        return
+    transaction.on_commit(lambda: _publish_now(event_type, data() if callable(data) else data))
+
+
+def _publish_now(event_type, data):
+    hub.publish(event_type, data)
+    if _broker_enabled():
+        try:
+            _channel().insert_one({'origin': _origin(), 'event': event_type, 'data': data})
+        except PyMongoError:
+            logger.exception("Failed to relay live event %s", event_type)
+
+
+def format_sse(event):
+    """Serialise an event (or None for a heartbeat) in text/event-stream format."""
+    if event is None:
+        return ': ping\n\n'
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+# --- Event payloads ---
+
+def request_payload(relief_request):
+    volunteer = relief_request.assigned_to_volunteer
+    return {
+        'id': relief_request.id,
+        'requester': relief_request.requester.username,
+        'request_type': relief_request.request_type,
+        'status': relief_request.status,
+        'assigned_to': volunteer.username if volunteer else None,
+        'created_at': relief_request.created_at.isoformat(),
+    }
+
+
+def alert_payload(alert):
+    timestamp = alert.get('timestamp')
+    return {
+        'message': alert.get('message'),
+        'severity': alert.get('severity'),
+        'posted_by': alert.get('posted_by'),
+        'is_active': alert.get('is_active'),
+        'timestamp': timestamp.isoformat() if timestamp else None,
+    }
+
+
+# --- Cross-process relay (LIVE_EVENTS_BROKER = 'mongo') ---
+
+CHANNEL_COLLECTION = 'live_events'
+
+_channel_collection = None
+_relay = None
+_relay_pid = None
+_relay_lock = threading.Lock()
+
+
+def _broker_enabled():
+    return getattr(settings, 'LIVE_EVENTS_BROKER', None) == 'mongo'
+
+
+def _origin():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _channel():
+    """The capped collection events are relayed through, created on first use."""
+    global _channel_collection
+
+    pid = os.getpid()
+    if _channel_collection is None or _channel_collection[0] != pid:
+        from .mongo import get_database
+
+        database = get_database()
+        try:
+            database.create_collection(
+                CHANNEL_COLLECTION, capped=True,
+                size=getattr(settings, 'LIVE_EVENTS_BROKER_SIZE', 1024 * 1024),
+                max=getattr(settings, 'LIVE_EVENTS_HISTORY', 256),
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        _channel_collection = (pid, database[CHANNEL_COLLECTION])  # per process, like the client
+    return _channel_collection[1]
+
+
+def _relay_forever():
+    """Tail the channel and publish other processes' events on the local hub."""
+    origin = _origin()
+    # Events still in the collection; enough to recognise everything a re-opened cursor replays
+    seen = set()
+    order = deque()
+
+    def remember(event_id):
+        seen.add(event_id)
+        order.append(event_id)
+        if len(order) > 2 * getattr(settings, 'LIVE_EVENTS_HISTORY', 256):
+            seen.discard(order.popleft())
+
+    started = False
+    while True:
+        try:
+            channel = _channel()
+            if not started:
+                # Whatever is already there happened before this process was listening
+                for doc in channel.find({}, {'_id': 1}):
+                    remember(doc['_id'])
+                started = True
+            cursor = channel.find(cursor_type=CursorType.TAILABLE_AWAIT)
+            while cursor.alive:
+                for doc in cursor:
+                    if doc['_id'] in seen:
+                        continue
+                    remember(doc['_id'])
+                    if doc.get('origin') != origin:
+                        hub.publish(doc['event'], doc['data'])
+        except PyMongoError:
+            logger.exception("Live event relay lost its MongoDB cursor")
+        # An empty capped collection gives a dead cursor at once; wait before re-opening
+        time.sleep(1)
+
+
+def ensure_relay():
+    """Start the relay thread once per process (again after a fork), if a broker is configured."""
+    global _relay, _relay_pid
+
+    if not _broker_enabled():
+        return
+    pid = os.getpid()
+    if _relay is not None and _relay_pid == pid:
+        return
+    with _relay_lock:
+        if _relay is None or _relay_pid != pid:
+            _relay = threading.Thread(target=_relay_forever, name='live-event-relay', daemon=True)
+            _relay.start()
+            _relay_pid = pid
@@ -0,0 +1,190 @@
+# core_app/export.py
+"""
+Streaming export of relief requests as NDJSON, CSV or GeoJSON.
+
+Rows are read with QuerySet.iterator(chunk_size=...), which uses a server-side
+cursor on PostgreSQL, and each row is serialised and yielded immediately, so
+memory use stays flat no matter how many rows are exported.
+
+Under an ASGI server Django would read a plain (sync) iterator into a list
+before sending any of it, so views serve astream_export() there instead: an
+async iterator that pulls the same chunks from a worker thread in ~64 KB
+batches.
+"""
+import csv
+import datetime
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'geojson': 'application/geo+json',
+}
+
+EXPORT_FIELDS = [
+    'id', 'request_type', 'status', 'latitude', 'longitude',
+    'assigned_to', 'created_at', 'updated_at',
+]
+
+
+def parse_timestamp(value):
+    """Parse an ISO date or datetime (naive values are taken as the current time zone)."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date/time: {value!r}")
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_bbox(value):
+    """Parse 'min_lon,min_lat,max_lon,max_lat' into a tuple of floats."""
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in value.split(','))
+    except ValueError:
+        raise ValueError(f"Invalid bbox: {value!r} (expected min_lon,min_lat,max_lon,max_lat)")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def export_queryset(since=None, until=None, bbox=None, include_archived=True):
+    """
+    Relief requests to export, as value tuples in EXPORT_FIELDS order, from the
+    live table and (unless include_archived is False) the archive table.
+    `bbox` is (min_lon, min_lat, max_lon, max_lat), the GeoJSON convention.
+    """
+    from .models import ArchivedReliefRequest, ReliefRequest
+
+    def rows(qs):
+        if since is not None:
+            qs = qs.filter(created_at__gte=since)
+        if until is not None:
+            qs = qs.filter(created_at__lt=until)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            qs = qs.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+        return qs.values_list(
+            'id', 'request_type', 'status', 'latitude', 'longitude',
+            'assigned_to_volunteer__username', 'created_at', 'updated_at',
+        )
+
+    qs = rows(ReliefRequest.objects.all())
+    if include_archived:
+        # Ids are unique across both tables, so UNION ALL loses nothing
+        qs = qs.union(rows(ArchivedReliefRequest.objects.all()), all=True)
+    return qs.order_by('id')
+
+
+def _iter_rows(queryset):
+    chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    for values in queryset.iterator(chunk_size=chunk_size):
+        row = dict(zip(EXPORT_FIELDS, values))
+        row['latitude'] = float(row['latitude'])
+        row['longitude'] = float(row['longitude'])
+        row['created_at'] = row['created_at'].isoformat()
+        row['updated_at'] = row['updated_at'].isoformat()
+        yield row
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writeheader()
+    yield flush()
+    for row in rows:
+        writer.writerow(row)
+        yield flush()
+
+
+def _geojson(rows):
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    for row in rows:
+        properties = {k: v for k, v in row.items() if k not in ('latitude', 'longitude')}
+        feature = {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [row['longitude'], row['latitude']]},
+            'properties': properties,
+        }
+        yield separator + json.dumps(feature)
+        separator = ','
+    yield ']}\n'
+
+
+_SERIALISERS = {
+    'ndjson': _ndjson,
+    'csv': _csv,
+    'geojson': _geojson,
+}
+
+
+def _gzip(chunks, min_flush=64 * 1024):
+    """gzip-compress a stream of text chunks, emitting compressed blocks of ~min_flush bytes."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    pending = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        pending += len(chunk)
+        if pending >= min_flush:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(queryset, fmt='ndjson', compress=False):
+    """Yield the export of `queryset` (from export_queryset) as str chunks, or bytes if compressed."""
+    chunks = _SERIALISERS[fmt](_iter_rows(queryset))
+    if compress:
+        return _gzip(chunks)
+    return chunks
+
+
+async def astream_export(queryset, fmt='ndjson', compress=False, min_batch=64 * 1024):
+    """stream_export() as an async iterator, for responses served by an ASGI server."""
+    chunks = stream_export(queryset, fmt, compress)
+
+    def take():
+        # The rows come from a database cursor, so they are always read on the same thread
+        batch, size = [], 0
+        for chunk in chunks:
+            batch.append(chunk)
+            size += len(chunk)
+            if size >= min_batch:
+                break
+        return batch
+
+    try:
+        while True:
+            batch = await sync_to_async(take, thread_sensitive=True)()
+            if not batch:
+                return
+            yield batch[0][:0].join(batch)
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
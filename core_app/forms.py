@@ -69,3 +69,19 @@ class AlertForm(forms.Form):
         ('Critical', 'Critical'),
     ], initial='Medium')
     is_active = forms.BooleanField(label='Active Alert', initial=True, required=False)
+    expires_in_hours = forms.IntegerField(
+        label='Expires in (hours)',
+        min_value=1,
+        required=False,
+        help_text='Leave blank for the default lifetime.'
+    )
+
+    def __init__(self, *args, **kwargs):
+        from django.conf import settings
+        from django.core.validators import MaxValueValidator
+
+        super().__init__(*args, **kwargs)
+        max_hours = getattr(settings, 'ALERTS_MAX_LIFETIME_HOURS', 24 * 30)
+        field = self.fields['expires_in_hours']
+        field.validators.append(MaxValueValidator(max_hours))
+        field.widget.attrs.update(max=max_hours, placeholder=getattr(settings, 'ALERTS_DEFAULT_LIFETIME_HOURS', 72))
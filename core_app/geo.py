@@ -0,0 +1,148 @@
+# core_app/geo.py
+"""
+Small geospatial helpers: geohash encoding and bounding-box cell coverage.
+
+Profiles store the geohash of their location in an indexed column. Every
+geohash prefix is a rectangular cell, so "everyone near this point" becomes a
+handful of indexed `geohash LIKE 'prefix%'` range scans plus a lat/lon
+bounding-box filter, instead of computing a distance for every row.
+"""
+from math import cos, radians, floor, ceil
+
+from django.db.models import Q
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells; stored precision on Profile
+KM_PER_DEGREE_LAT = 111.32
+
+
+def encode_geohash(lat, lon, precision=GEOHASH_PRECISION):
+    """Return the geohash of (lat, lon), or '' if either coordinate is missing."""
+    if lat is None or lon is None:
+        return ''
+    lat, lon = float(lat), float(lon)
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_bounds(geohash):
+    """(min_lat, max_lat, min_lon, max_lon) of the cell named by `geohash`."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        bits = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (bits >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell at `precision`."""
+    total_bits = 5 * precision
+    lon_bits = ceil(total_bits / 2)
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing a circle of `radius_km`."""
+    lat, lon = float(lat), float(lon)
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles; clamp to avoid division by ~0.
+    dlon = radius_km / (KM_PER_DEGREE_LAT * max(cos(radians(lat)), 0.01))
+    return (
+        max(lat - dlat, -90.0),
+        min(lat + dlat, 90.0),
+        max(lon - dlon, -180.0),
+        min(lon + dlon, 180.0),
+    )
+
+
+def _grid(bbox, precision):
+    """Row and column index ranges of the precision-`precision` cells overlapping `bbox`."""
+    min_lat, max_lat, min_lon, max_lon = bbox
+    h, w = cell_size(precision)
+    rows = range(floor((min_lat + 90.0) / h), floor((max_lat + 90.0) / h) + 1)
+    cols = range(floor((min_lon + 180.0) / w), floor((max_lon + 180.0) / w) + 1)
+    return rows, cols, h, w
+
+
+def cells_in_bbox(bbox, precision):
+    """Every geohash of length `precision` whose cell overlaps `bbox`."""
+    rows, cols, h, w = _grid(bbox, precision)
+    cells = set()
+    for r in rows:
+        for c in cols:
+            center_lat = min(-90.0 + (r + 0.5) * h, 90.0)
+            center_lon = min(-180.0 + (c + 0.5) * w, 180.0)
+            cells.add(encode_geohash(center_lat, center_lon, precision))
+    return sorted(cells)
+
+
+def covering_cells(bbox, max_cells=16):
+    """
+    Geohash prefixes whose cells together cover `bbox`.
+
+    Picks the finest precision that needs at most `max_cells` cells, so the
+    SQL prefilter stays a small number of index range scans.
+    """
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        rows, cols, _, _ = _grid(bbox, precision)
+        if len(rows) * len(cols) > max_cells:
+            break
+        best = precision
+
+    if best is None:
+        return ['']  # bbox is huge: every geohash matches the empty prefix
+    return cells_in_bbox(bbox, best)
+
+
+def cells_filter(bbox, field='geohash', max_cells=16):
+    """
+    Q matching rows whose `field` (a geohash column, possibly across a
+    relation, e.g. 'profile__geohash') lies in one of the covering_cells of
+    `bbox`. Combine it with an exact lat/lon range on the same bbox.
+    """
+    cells = Q()
+    for prefix in covering_cells(bbox, max_cells=max_cells):
+        cells |= Q(**{f'{field}__startswith': prefix})
+    return cells
@@ -0,0 +1,240 @@
+# core_app/jobs.py
+"""
+Database-backed queue for auto-assignment jobs.
+
+auto_assign_request_view only enqueues an AssignmentJob and returns, and so
+does batch_assign_view, whose 'batch' job runs
+assignment.run_batch_assignment over every Pending request. Worker
+processes (`manage.py assignment_worker`, run as many copies as needed) claim
+due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never
+wait on each other or take the same job, then run the volunteer ranking and
+commit. No broker is needed: the jobs table is the queue.
+
+A job whose request has no eligible volunteer yet, or that raises, is retried
+with exponential backoff up to ASSIGNMENT_JOB_MAX_ATTEMPTS times. A job left
+'running' by a crashed worker is claimed again after
+ASSIGNMENT_JOB_TIMEOUT_SECONDS.
+"""
+import datetime
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import AssignmentJob, Profile, ReliefRequest
+from .services import choose_best_volunteer
+
+logger = logging.getLogger(__name__)
+
+
+class NoVolunteerAvailable(Exception):
+    pass
+
+
+def enqueue_assignment(relief_request, requested_by=None):
+    """
+    Queue auto-assignment of `relief_request`. Returns (job, created); an
+    already queued or running job for the request is returned as is.
+    """
+    open_jobs = AssignmentJob.objects.filter(
+        relief_request=relief_request, status__in=AssignmentJob.OPEN_STATUSES,
+    )
+    job = open_jobs.first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            return AssignmentJob.objects.create(relief_request=relief_request, requested_by=requested_by), True
+    except IntegrityError:
+        # Lost a race with a concurrent click; the other job stands
+        return open_jobs.get(), False
+
+
+def enqueue_batch_assignment(requested_by=None):
+    """
+    Queue a batch assignment of every Pending request. Returns (job, created);
+    an already queued or running batch job is returned as is.
+    """
+    open_jobs = AssignmentJob.objects.filter(kind='batch', status__in=AssignmentJob.OPEN_STATUSES)
+    job = open_jobs.first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            return AssignmentJob.objects.create(kind='batch', requested_by=requested_by), True
+    except IntegrityError:
+        return open_jobs.get(), False
+
+
+def latest_batch_job():
+    """The most recent batch assignment job, or None."""
+    return AssignmentJob.objects.filter(kind='batch').order_by('-id').first()
+
+
+def latest_jobs(request_ids):
+    """{request_id: most recent AssignmentJob} for the given requests, in one query."""
+    latest = {}
+    jobs = (
+        AssignmentJob.objects.filter(relief_request_id__in=request_ids)
+        .only('id', 'relief_request_id', 'status', 'attempts', 'result')
+        .order_by('relief_request_id', '-id')
+    )
+    for job in jobs:
+        latest.setdefault(job.relief_request_id, job)
+    return latest
+
+
+def queue_summary():
+    """Number of queued, running and failed jobs, for the dashboard."""
+    counts = dict(
+        AssignmentJob.objects.filter(status__in=['queued', 'running', 'failed'])
+        .values('status').annotate(n=Count('id')).values_list('status', 'n')
+    )
+    return {status: counts.get(status, 0) for status in ('queued', 'running', 'failed')}
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_jobs(worker, limit=10):
+    """Mark up to `limit` due jobs as running for `worker` and return them."""
+    now = timezone.now()
+    timeout = getattr(settings, 'ASSIGNMENT_JOB_TIMEOUT_SECONDS', 300)
+    with transaction.atomic():
+        jobs = list(
+            AssignmentJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='queued', run_after__lte=now)
+                | Q(status='running', locked_at__lt=now - datetime.timedelta(seconds=timeout))
+            )
+            .order_by('run_after', 'id')[:limit]
+        )
+        for job in jobs:
+            job.status = 'running'
+            job.attempts += 1
+            job.locked_at = now
+            job.worker = worker
+        AssignmentJob.objects.bulk_update(jobs, ['status', 'attempts', 'locked_at', 'worker'])
+    return jobs
+
+
+def _assign(job, max_active_tasks=1):
+    """
+    Assign the job's request; returns the volunteer, or None if the request no longer needs one.
+
+    The ranking reads volunteers without locks, so two workers can pick the same
+    one. The pick is confirmed by locking its profile and re-checking its
+    active_task_count; a volunteer taken meanwhile is skipped and the ranking
+    re-run, up to ASSIGNMENT_JOB_RERANKS times. When nobody has capacity left the
+    request goes to the best-ranked volunteer anyway, as choose_best_volunteer
+    does, unless ASSIGNMENT_JOB_REQUIRE_CAPACITY is set.
+    """
+    with transaction.atomic():
+        # Short locks: this request's row, then one volunteer's profile, only inside the worker
+        relief_request = ReliefRequest.objects.select_for_update().get(pk=job.relief_request_id)
+        if relief_request.status != 'Pending':
+            return None
+        taken = set()
+        fallback = None
+        for _ in range(getattr(settings, 'ASSIGNMENT_JOB_RERANKS', 3)):
+            volunteer = choose_best_volunteer(relief_request, max_active_tasks=max_active_tasks, exclude=taken)
+            if volunteer is None:
+                break
+            fallback = fallback or volunteer
+            active = (
+                Profile.objects.select_for_update().filter(user_id=volunteer.id)
+                .values_list('active_task_count', flat=True).first()
+            )
+            if active is not None and active < max_active_tasks:
+                break
+            if volunteer.active_tasks >= max_active_tasks:
+                volunteer = None  # the ranking found nobody with capacity
+                break
+            taken.add(volunteer.id)
+        else:
+            volunteer = None
+
+        if volunteer is None and not getattr(settings, 'ASSIGNMENT_JOB_REQUIRE_CAPACITY', False):
+            volunteer = fallback
+        if volunteer is None:
+            raise NoVolunteerAvailable("No eligible volunteers are available right now.")
+        relief_request.assigned_to_volunteer = volunteer
+        relief_request.status = 'Assigned'
+        relief_request.save(update_fields=['assigned_to_volunteer', 'status', 'updated_at'])
+        return volunteer
+
+
+def _run_batch(job):
+    """Run a batch job; it is never retried, since requests left over wait for the next one."""
+    from .assignment import run_batch_assignment
+
+    try:
+        report = run_batch_assignment(max_active_tasks=1)
+    except Exception as e:
+        logger.exception("Batch assignment job #%s failed", job.id)
+        job.status, job.result = 'failed', str(e)[:255]
+    else:
+        job.status = 'done'
+        job.result = f"Assigned {len(report['assigned'])} of {report['pending']} pending requests."
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'locked_at', 'finished_at'])
+    return job
+
+
+def run_job(job):
+    """Run one claimed job and record its outcome (done, retry later, or failed)."""
+    if job.kind == 'batch':
+        return _run_batch(job)
+    now = timezone.now()
+    try:
+        volunteer = _assign(job)
+    except ReliefRequest.DoesNotExist:
+        job.status, job.result = 'failed', "The request no longer exists."
+    except Exception as e:
+        if not isinstance(e, NoVolunteerAvailable):
+            logger.exception("Assignment job #%s failed", job.id)
+        max_attempts = getattr(settings, 'ASSIGNMENT_JOB_MAX_ATTEMPTS', 5)
+        job.result = str(e)[:255]
+        if job.attempts < max_attempts:
+            delay = getattr(settings, 'ASSIGNMENT_JOB_RETRY_DELAY_SECONDS', 30) * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_after = now + datetime.timedelta(seconds=delay)
+        else:
+            job.status = 'failed'
+    else:
+        job.status = 'done'
+        job.assigned_volunteer = volunteer
+        job.result = f"Assigned to {volunteer.username}." if volunteer else "Request was no longer pending."
+
+    job.locked_at = None
+    if job.status in ('done', 'failed'):
+        job.finished_at = now
+    job.save(update_fields=['status', 'result', 'run_after', 'locked_at', 'assigned_volunteer', 'finished_at'])
+    return job
+
+
+def work(worker=None, batch_size=10, poll_interval=1.0, once=False):
+    """
+    Claim and run jobs until stopped. Sleeps `poll_interval` seconds when the
+    queue is empty; with `once`, returns after the queue is drained.
+    Returns the number of jobs run.
+    """
+    worker = worker or default_worker_name()
+    processed = 0
+    while True:
+        close_old_connections()
+        jobs = claim_jobs(worker, batch_size)
+        for job in jobs:
+            run_job(job)
+            processed += 1
+        if not jobs:
+            if once:
+                return processed
+            time.sleep(poll_interval)
@@ -0,0 +1,174 @@
+# core_app/locations.py
+"""
+Coalesced write path for volunteer location pings.
+
+update_location only records the fix in an in-process buffer that keeps the
+latest fix per user. A background thread flushes the buffer every
+LOCATION_FLUSH_INTERVAL seconds with a single bulk_update of
+latitude/longitude/location_updated_at/geohash, so many pings cost one write.
+
+A user's fix is stored at most once per LOCATION_MIN_INTERVAL_SECONDS; newer
+fixes that arrive in between replace the buffered one and are written once the
+interval has passed (with LOCATION_FLUSH_INTERVAL = 0 every fix is written
+at once). A fix never overwrites a stored location that is as new or newer,
+and fixes whose write fails are buffered again for the next flush.
+Buffered fixes are flushed at interpreter exit, but are lost if the worker
+crashes - acceptable for GPS pings that repeat anyway.
+"""
+import atexit
+import logging
+import operator
+import os
+import threading
+import time
+from functools import reduce
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .geo import encode_geohash
+
+logger = logging.getLogger(__name__)
+
+_pending = {}      # user_id -> (latitude, longitude, fixed_at)
+_last_stored = {}  # user_id -> time.monotonic() of the last stored fix
+_lock = threading.Lock()
+_flusher = None
+_flusher_pid = None
+
+
+def _flush_interval():
+    return getattr(settings, 'LOCATION_FLUSH_INTERVAL', 5)
+
+
+def _min_interval():
+    return getattr(settings, 'LOCATION_MIN_INTERVAL_SECONDS', 10)
+
+
+def record_location(user_id, latitude, longitude, fixed_at=None):
+    """Buffer a location fix for `user_id`; only the latest fix per user is kept."""
+    fix = (latitude, longitude, fixed_at or timezone.now())
+    with _lock:
+        _pending[user_id] = fix
+
+    if _flush_interval() <= 0:
+        flush_locations(force=True)  # write-through (tests, single-process dev server)
+    else:
+        _ensure_flusher()
+
+
+def pending_location(user_id):
+    """The buffered, not yet stored fix for `user_id` as (lat, lon, fixed_at), or None."""
+    return _pending.get(user_id)
+
+
+def _is_older_than(fixed_at):
+    return Q(location_updated_at__isnull=True) | Q(location_updated_at__lt=fixed_at)
+
+
+def _store(fixes):
+    """
+    Write {user_id: (lat, lon, fixed_at)} with one conditional UPDATE. A profile
+    whose stored location is already as new as the fix (say, a manual edit in
+    the admin) keeps it. Returns the number of profiles updated.
+    """
+    from .models import Profile
+
+    matches = {user_id: Q(user_id=user_id) & _is_older_than(fix[2]) for user_id, fix in fixes.items()}
+    values = {
+        'latitude': {user_id: fix[0] for user_id, fix in fixes.items()},
+        'longitude': {user_id: fix[1] for user_id, fix in fixes.items()},
+        'location_updated_at': {user_id: fix[2] for user_id, fix in fixes.items()},
+        'geohash': {user_id: encode_geohash(fix[0], fix[1]) for user_id, fix in fixes.items()},
+    }
+    return Profile.objects.filter(reduce(operator.or_, matches.values())).update(**{
+        name: Case(
+            *[When(Q(user_id=user_id), then=Value(value)) for user_id, value in by_user.items()],
+            default=F(name),
+            output_field=Profile._meta.get_field(name),
+        )
+        for name, by_user in values.items()
+    })
+
+
+def flush_locations(force=False, batch_size=500):
+    """
+    Store buffered fixes, `batch_size` users per UPDATE. Fixes for users whose
+    last stored fix is more recent than LOCATION_MIN_INTERVAL_SECONDS stay
+    buffered unless `force` is set. If a write fails, its fixes go back into
+    the buffer (unless a newer one has arrived meanwhile) and the error is
+    raised. Returns the number of profiles updated.
+    """
+    now = time.monotonic()
+    min_interval = _min_interval()
+    with _lock:
+        due = {
+            user_id: fix for user_id, fix in _pending.items()
+            if force or now - _last_stored.get(user_id, float('-inf')) >= min_interval
+        }
+        for user_id in due:
+            del _pending[user_id]
+        # Entries past the interval throttle nothing, so drop them rather than keep every user ever seen
+        for user_id in [u for u, stored in _last_stored.items() if now - stored >= min_interval]:
+            del _last_stored[user_id]
+    if not due:
+        return 0
+
+    updated = 0
+    user_ids = list(due)
+    for start in range(0, len(user_ids), batch_size):
+        batch = {user_id: due[user_id] for user_id in user_ids[start:start + batch_size]}
+        try:
+            updated += _store(batch)
+        except Exception:
+            with _lock:
+                for user_id in user_ids[start:]:
+                    _pending.setdefault(user_id, due[user_id])
+            raise
+        with _lock:
+            for user_id in batch:
+                _last_stored[user_id] = now
+    return updated
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_locations()
+        except Exception:
+            logger.exception("Failed to flush buffered volunteer locations")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """Start the background flush thread once per process (again after a fork)."""
+    global _flusher, _flusher_pid
+
+    pid = os.getpid()
+    if _flusher is not None and _flusher_pid == pid:
+        return
+    with _lock:
+        if _flusher is None or _flusher_pid != pid:
+            _flusher = threading.Thread(
+                target=_flush_forever,
+                args=(_flush_interval(),),
+                name='location-flusher',
+                daemon=True,
+            )
+            _flusher.start()
+            _flusher_pid = pid
+
+
+def _flush_at_exit():
+    if _pending:
+        try:
+            flush_locations(force=True)
+        except Exception:
+            logger.exception("Failed to flush buffered volunteer locations at exit")
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,21 @@
+# core_app/management/commands/archive_alerts.py
+from django.core.management.base import BaseCommand
+
+from core_app.alerts import archive_alerts, backfill_expiry
+
+
+class Command(BaseCommand):
+    help = (
+        "Move inactive and expired alerts to the alerts archive. Also gives alerts "
+        "posted before expiry existed an expires_at. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backfilled = backfill_expiry(batch_size=options['batch_size'])
+        archived = archive_alerts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{archived} alerts archived, {backfilled} given an expiry."
+        ))
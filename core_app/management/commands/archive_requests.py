@@ -0,0 +1,28 @@
+# core_app/management/commands/archive_requests.py
+from django.core.management.base import BaseCommand
+
+from core_app.archive import archive_closed_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Move Completed and Cancelled requests older than REQUEST_ARCHIVE_AFTER_DAYS "
+        "to the archive table. Safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help="Override REQUEST_ARCHIVE_AFTER_DAYS.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report how many requests would be archived without moving them.",
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_closed_requests(
+            older_than_days=options['older_than_days'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        prefix = "[dry run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{moved} requests archived."))
@@ -0,0 +1,51 @@
+# core_app/management/commands/assignment_worker.py
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core_app.jobs import default_worker_name, work
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued auto-assignment jobs. Start several copies to add workers; "
+        "they share the queue without blocking each other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help="Jobs claimed per round trip.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once no jobs are due.")
+        parser.add_argument('--name', default=None, help="Worker name recorded on claimed jobs.")
+
+    def handle(self, *args, **options):
+        name = options['name'] or default_worker_name()
+        self.warn_process_local_state()
+        self.stdout.write(f"Assignment worker {name} started.")
+        try:
+            processed = work(
+                worker=name,
+                batch_size=options['batch_size'],
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+            )
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"{processed} jobs run."))
+
+    def warn_process_local_state(self):
+        """The worker's cache evictions and live events only reach web processes through shared services."""
+        for setting in ('NEARBY_CACHE_ALIAS', 'MAP_CLUSTER_CACHE_ALIAS'):
+            alias = getattr(settings, setting, 'default')
+            if isinstance(caches[alias], LocMemCache):
+                self.stderr.write(self.style.WARNING(
+                    f"{setting} ('{alias}') is a per-process cache: web processes keep serving "
+                    f"results cached before this worker's assignments until they expire."
+                ))
+        if getattr(settings, 'LIVE_EVENTS_ENABLED', False) and not getattr(settings, 'LIVE_EVENTS_BROKER', None):
+            self.stderr.write(self.style.WARNING(
+                "LIVE_EVENTS_BROKER is not set: assignments made by this worker won't appear "
+                "on live dashboards until they reload."
+            ))
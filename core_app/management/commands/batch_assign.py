@@ -0,0 +1,44 @@
+# core_app/management/commands/batch_assign.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from core_app.assignment import run_batch_assignment
+
+
+class Command(BaseCommand):
+    help = "Assign all Pending relief requests to volunteers in one optimised batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-active-tasks', type=int, default=1,
+            help="Maximum number of active tasks per volunteer (default: 1).",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Compute and report the assignments without saving them.",
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help="Print the full report as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        report = run_batch_assignment(
+            max_active_tasks=options['max_active_tasks'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for item in report['assigned']:
+            distance = '?' if item['distance_km'] is None else f"{item['distance_km']} km"
+            self.stdout.write(f"Request #{item['request_id']} -> {item['volunteer']} ({distance})")
+
+        prefix = "[dry run] " if report['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Assigned {len(report['assigned'])} of {report['pending']} pending requests "
+            f"({report['volunteers']} volunteers considered, {len(report['unassigned'])} left pending)."
+        ))
@@ -0,0 +1,46 @@
+# core_app/management/commands/export_requests.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_app.export import EXPORT_FORMATS, export_queryset, parse_bbox, parse_timestamp, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream all relief requests as NDJSON, CSV or GeoJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--since', help="Only requests created at or after this ISO date/time.")
+        parser.add_argument('--until', help="Only requests created before this ISO date/time.")
+        parser.add_argument('--bbox', help="min_lon,min_lat,max_lon,max_lat")
+        parser.add_argument('--live-only', action='store_true', help="Leave out archived requests.")
+        parser.add_argument('--gzip', action='store_true', help="gzip-compress the output.")
+        parser.add_argument('--output', '-o', help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            queryset = export_queryset(
+                since=parse_timestamp(options['since']),
+                until=parse_timestamp(options['until']),
+                bbox=parse_bbox(options['bbox']),
+                include_archived=not options['live_only'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = stream_export(queryset, options['format'], compress=options['gzip'])
+
+        if options['output']:
+            mode = 'wb' if options['gzip'] else 'w'
+            encoding = None if options['gzip'] else 'utf-8'
+            with open(options['output'], mode, encoding=encoding, newline='' if encoding else None) as out:
+                for chunk in chunks:
+                    out.write(chunk)
+        elif options['gzip']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
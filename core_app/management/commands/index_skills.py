@@ -0,0 +1,23 @@
+# core_app/management/commands/index_skills.py
+from django.core.management.base import BaseCommand
+
+from core_app.skills import reindex_skill_tags
+
+
+class Command(BaseCommand):
+    help = "Re-parse every profile's skills_bio into skill tags (run after changing SKILL_SYNONYMS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report how many profiles would change without saving.",
+        )
+
+    def handle(self, *args, **options):
+        changed = reindex_skill_tags(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        prefix = "[dry run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{changed} profiles re-indexed."))
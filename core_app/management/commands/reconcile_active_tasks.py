@@ -0,0 +1,26 @@
+# core_app/management/commands/reconcile_active_tasks.py
+from django.core.management.base import BaseCommand
+
+from core_app.services import reconcile_active_task_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute every volunteer's active task counter and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report drifted counters without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        fixes = reconcile_active_task_counts(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        for user_id, stored, actual in fixes:
+            self.stdout.write(f"User #{user_id}: stored {stored}, actual {actual}")
+
+        prefix = "[dry run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{len(fixes)} counters corrected."))
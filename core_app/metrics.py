@@ -0,0 +1,322 @@
+# core_app/metrics.py
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+MetricsMiddleware records, per URL name: request latency, and the number and
+time of SQL queries (an execute_wrapper on every database alias, replicas
+included) and MongoDB commands (a pymongo CommandListener) made while
+handling the request. `timed()` measures any other block, e.g.
+choose_best_volunteer(), and TimedDjangoTemplates times template rendering.
+Everything is served by metrics_view at /metrics.
+
+Recording is a few additions under one lock per observation, cheap enough to
+leave on. Metrics are per worker process; Prometheus should scrape each
+worker (or sum them) as usual for multi-process deployments.
+"""
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Any other method is labelled 'other', so clients can't create label values at will
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'CONNECT', 'TRACE'})
+
+
+# --- Registry ---
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}    # (name, labels) -> float
+        self._help = {}
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def observe(self, name, labels, value, buckets=DEFAULT_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def exposition(self):
+        """Render all metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            histograms = [(k, h.buckets, list(h.counts), h.sum, h.count) for k, h in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described and name in self._help:
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            described.add(name)
+
+        for (name, labels), value in sorted(counters):
+            header(name)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for (name, labels), buckets, counts, total, count in sorted(histograms, key=lambda h: h[0]):
+            header(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+registry.describe('asha_http_request_duration_seconds', 'histogram', 'Request latency by URL name.')
+registry.describe('asha_http_request_sql_queries', 'histogram', 'SQL queries per request by URL name.')
+registry.describe('asha_sql_queries_total', 'counter', 'SQL queries executed, by URL name.')
+registry.describe('asha_sql_duration_seconds_total', 'counter', 'Time spent in SQL queries, by URL name.')
+registry.describe('asha_mongo_operations_total', 'counter', 'MongoDB commands, by URL name and command.')
+registry.describe('asha_mongo_duration_seconds_total', 'counter', 'Time spent in MongoDB commands, by URL name and command.')
+registry.describe('asha_timer_duration_seconds', 'histogram', 'Duration of instrumented code blocks.')
+registry.describe('asha_template_render_duration_seconds', 'histogram', 'Template rendering time by template.')
+
+
+# --- Per-request accounting ---
+
+class RequestStats:
+    __slots__ = ('sql_count', 'sql_seconds', 'mongo')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.mongo = {}  # command name -> [count, seconds]
+
+
+_current = contextvars.ContextVar('asha_request_stats', default=None)
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+def _record_request(request, stats, seconds):
+    view = _view_label(request)
+    method = request.method if request.method in HTTP_METHODS else 'other'
+    labels = {'view': view, 'method': method}
+    registry.observe('asha_http_request_duration_seconds', labels, seconds)
+    if stats is None:
+        return
+    registry.observe('asha_http_request_sql_queries', {'view': view}, stats.sql_count, COUNT_BUCKETS)
+    if stats.sql_count:
+        registry.inc('asha_sql_queries_total', {'view': view}, stats.sql_count)
+        registry.inc('asha_sql_duration_seconds_total', {'view': view}, stats.sql_seconds)
+    for command, (count, mongo_seconds) in stats.mongo.items():
+        registry.inc('asha_mongo_operations_total', {'view': view, 'command': command}, count)
+        registry.inc('asha_mongo_duration_seconds_total', {'view': view, 'command': command}, mongo_seconds)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Records latency, SQL and MongoDB usage for every request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Wrapping doesn't open connections; aliases the request never uses stay closed
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_sql_wrapper))
+                return self.get_response(request)
+        finally:
+            _record_request(request, stats, time.perf_counter() - start)
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        # ORM calls run in worker threads here, so only latency is recorded
+        start = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            _record_request(request, None, time.perf_counter() - start)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts MongoDB commands and their server round-trip time."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        stats = _current.get()
+        if stats is None:
+            registry.inc('asha_mongo_operations_total', {'view': 'background', 'command': event.command_name})
+            return
+        entry = stats.mongo.setdefault(event.command_name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += event.duration_micros / 1e6
+
+
+# --- Timers ---
+
+@contextmanager
+def timer(name):
+    """Time a block: `with timer('ranking'): ...`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe('asha_timer_duration_seconds', {'name': name}, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of timer()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            registry.observe(
+                'asha_template_render_duration_seconds',
+                {'template': self._template.origin.template_name},
+                time.perf_counter() - start,
+            )
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that records rendering time per template."""
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+
+# --- Endpoint ---
+
+def _metrics_allowed(request):
+    user = getattr(request, 'user', None)
+    if user and user.is_superuser:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    # Compared as bytes: compare_digest rejects str with non-ASCII characters
+    authorization = request.headers.get('Authorization', '').encode()
+    if token and hmac.compare_digest(authorization, f'Bearer {token}'.encode()):
+        return True
+    # Only meaningful when the app server is reached directly: behind a proxy on the
+    # same host every request comes from the proxy's address
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; open to superusers, scrapers sending
+    `Authorization: Bearer <METRICS_TOKEN>`, and METRICS_ALLOWED_IPS.
+    """
+    if not _metrics_allowed(request):
+        return HttpResponse("Forbidden", status=403, content_type='text/plain')
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
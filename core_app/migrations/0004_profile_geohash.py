@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    from core_app.geo import encode_geohash
+
+    Profile = apps.get_model('core_app', 'Profile')
+    batch = []
+    located = Profile.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for profile in located.only('id', 'latitude', 'longitude').iterator(chunk_size=1000):
+        profile.geohash = encode_geohash(profile.latitude, profile.longitude)
+        batch.append(profile)
+        if len(batch) >= 1000:
+            Profile.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Profile.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0003_profile_location_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
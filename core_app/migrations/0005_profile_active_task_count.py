@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:17
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_active_tasks(apps, schema_editor):
+    Profile = apps.get_model('core_app', 'Profile')
+    ReliefRequest = apps.get_model('core_app', 'ReliefRequest')
+
+    counts = (
+        ReliefRequest.objects.filter(status__in=['Assigned', 'En Route'], assigned_to_volunteer__isnull=False)
+        .values('assigned_to_volunteer')
+        .annotate(n=Count('id'))
+        .values_list('assigned_to_volunteer', 'n')
+    )
+    for user_id, n in counts:
+        Profile.objects.filter(user_id=user_id).update(active_task_count=n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0004_profile_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='active_task_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_active_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0005_profile_active_task_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(condition=models.Q(('status', 'Completed'), _negated=True), fields=['created_at', 'id'], name='request_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='request_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(fields=['requester', '-created_at'], name='request_requester_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(fields=['assigned_to_volunteer', 'status'], name='request_assignee_status_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+def backfill_skill_tags(apps, schema_editor):
+    from core_app.skills import parse_skill_tags
+
+    Profile = apps.get_model('core_app', 'Profile')
+    batch = []
+    with_bio = Profile.objects.exclude(skills_bio='')
+    for profile in with_bio.only('id', 'skills_bio').iterator(chunk_size=1000):
+        profile.skill_tags = parse_skill_tags(profile.skills_bio)
+        batch.append(profile)
+        if len(batch) >= 1000:
+            Profile.objects.bulk_update(batch, ['skill_tags'])
+            batch = []
+    if batch:
+        Profile.objects.bulk_update(batch, ['skill_tags'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0006_relief_request_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='skill_tags',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_skill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:40
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    from core_app.geo import encode_geohash
+
+    ReliefRequest = apps.get_model('core_app', 'ReliefRequest')
+    batch = []
+    for relief_request in ReliefRequest.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=1000):
+        relief_request.geohash = encode_geohash(relief_request.latitude, relief_request.longitude)
+        batch.append(relief_request)
+        if len(batch) >= 1000:
+            ReliefRequest.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        ReliefRequest.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0007_profile_skill_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reliefrequest',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0008_relief_request_geohash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reliefrequest',
+            name='co_requesters',
+            field=models.ManyToManyField(blank=True, related_name='joined_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='reliefrequest',
+            name='report_count',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(condition=models.Q(('status__in', ['Completed', 'Cancelled']), _negated=True), fields=['request_type', 'geohash'], name='request_open_type_cell_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+    ]
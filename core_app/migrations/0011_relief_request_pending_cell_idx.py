@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0010_assignment_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['geohash'], name='request_pending_cell_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0011_relief_request_pending_cell_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReliefRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('request_type', models.CharField(choices=[('Medical', 'Medical'), ('Food', 'Food'), ('Water', 'Water'), ('Shelter', 'Shelter'), ('Rescue', 'Rescue'), ('Other', 'Other')], max_length=50)),
+                ('description', models.TextField()),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Assigned', 'Assigned'), ('En Route', 'En Route'), ('Completed', 'Completed'), ('Cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('geohash', models.CharField(blank=True, max_length=12)),
+                ('report_count', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='reliefrequest',
+            name='request_open_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(condition=models.Q(models.Q(('status', 'Completed'), _negated=True), models.Q(('status', 'Cancelled'), _negated=True)), fields=['created_at', 'id'], name='request_open_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedreliefrequest',
+            name='assigned_to_volunteer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedreliefrequest',
+            name='co_requesters',
+            field=models.ManyToManyField(blank=True, related_name='joined_archived_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedreliefrequest',
+            name='requester',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedreliefrequest',
+            index=models.Index(fields=['requester', '-created_at'], name='archived_requester_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0012_archived_relief_request'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentjob',
+            name='kind',
+            field=models.CharField(choices=[('request', 'Single request'), ('batch', 'All pending requests')], default='request', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='assignmentjob',
+            name='relief_request',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assignment_jobs', to='core_app.reliefrequest'),
+        ),
+        migrations.AddConstraint(
+            model_name='assignmentjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'batch'), ('status__in', ['queued', 'running'])), fields=('kind',), name='job_one_open_batch'),
+        ),
+    ]
@@ -1,8 +1,74 @@
-from django.db import models
+import functools
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-class Profile(models.Model):
+from .geo import encode_geohash
+from .skills import parse_skill_tags
+
+
+class TrackChangesMixin:
+    """
+    Remembers the values a model instance was loaded with, so saves and signal
+    handlers can tell what changed without re-reading the row.
+
+    After each save, `saved_changes` maps the attnames written with a new value to
+    their previous value (empty for inserts).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the values loaded from the database so saves can detect changes without a query."""
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_values()
+        return instance
+
+    def _remember_loaded_values(self):
+        # Deferred fields are absent from __dict__ and are simply not tracked
+        self._loaded_values = {
+            f.attname: self.__dict__[f.attname]
+            for f in self._meta.concrete_fields
+            if f.attname in self.__dict__
+        }
+
+    def dirty_fields(self):
+        """Names of fields changed since this instance was loaded or last saved."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return {f.attname for f in self._meta.concrete_fields if not f.primary_key}
+        return {
+            name for name, value in loaded.items()
+            if self.__dict__.get(name, value) != value
+        }
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            self.saved_changes = {}
+        else:
+            update_fields = kwargs.get('update_fields')
+            self.saved_changes = {
+                name: loaded[name] for name in self.dirty_fields()
+                if update_fields is None
+                or name in update_fields
+                or name.removesuffix('_id') in update_fields
+            }
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or loaded is None:
+            self._remember_loaded_values()
+        else:
+            # Fields left out of update_fields still hold their old value in the DB
+            for name in self.saved_changes:
+                loaded[name] = self.__dict__[name]
+
+
+class Profile(TrackChangesMixin, models.Model):
     ROLE_CHOICES = (
         ('victim', 'Victim'),
         ('volunteer', 'Volunteer'),
@@ -20,34 +86,73 @@ class Profile(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     # Timestamp for last location update (volunteer or admin)
     location_updated_at = models.DateTimeField(null=True, blank=True)
+    # Geohash of (latitude, longitude); indexed prefix lookups find nearby volunteers
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+    # Number of Assigned/En Route requests for this user, kept exact by ReliefRequest.save()
+    active_task_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    # Bitmask of the request categories skills_bio covers (see core_app/skills.py)
+    skill_tags = models.PositiveIntegerField(default=0, editable=False)
+
+    LOCATION_FIELDS = ('latitude', 'longitude')
 
     def __str__(self):
         return f"{self.user.username} ({self.role})"
+
+    @staticmethod
+    def adjust_active_task_counts(deltas):
+        """
+        Apply {user_id: delta} to active_task_count with atomic F() updates, one
+        UPDATE per distinct delta. Counts never go below zero.
+        """
+        by_delta = {}
+        for user_id, delta in deltas.items():
+            if user_id is not None and delta:
+                by_delta.setdefault(delta, []).append(user_id)
+        for delta, user_ids in by_delta.items():
+            Profile.objects.filter(user_id__in=user_ids).update(
+                active_task_count=Greatest(F('active_task_count') + delta, 0)
+            )
+
     def save(self, *args, **kwargs):
         """
-        Update location_updated_at when latitude/longitude change.
+        Update location_updated_at and geohash when latitude/longitude change,
+        and skill_tags when skills_bio changes.
         This ensures admin edits also update the timestamp.
         """
-        try:
-            old = Profile.objects.get(pk=self.pk)
-        except Profile.DoesNotExist:
-            old = None
-
-        if old is None:
-            # New profile — if lat/lon provided, set timestamp now
-            if self.latitude is not None or self.longitude is not None:
-                self.location_updated_at = timezone.now()
+        if self._state.adding or getattr(self, '_loaded_values', None) is None:
+            # New profile (or one we can't compare) — if lat/lon provided, set timestamp now
+            location_changed = self.latitude is not None or self.longitude is not None
+            skills_changed = True
         else:
             # If either coordinate changed, update timestamp
-            lat_changed = (old.latitude != self.latitude)
-            lon_changed = (old.longitude != self.longitude)
-            if lat_changed or lon_changed:
-                self.location_updated_at = timezone.now()
+            dirty = self.dirty_fields()
+            location_changed = bool(set(self.LOCATION_FIELDS) & dirty)
+            skills_changed = 'skills_bio' in dirty
+
+        if skills_changed:
+            self.skill_tags = parse_skill_tags(self.skills_bio)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'skills_bio' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'skill_tags'}
+
+        if location_changed:
+            self.location_updated_at = timezone.now()
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'geohash', 'location_updated_at'}
+
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never overwrite the counter with a stale in-memory value on a full save
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'active_task_count'
+            ]
 
         super().save(*args, **kwargs)
 
 
-class ReliefRequest(models.Model):
+class ReliefRequest(TrackChangesMixin, models.Model):
     REQUEST_TYPE_CHOICES = [
         ('Medical', 'Medical'),
         ('Food', 'Food'),
@@ -65,6 +170,11 @@ class ReliefRequest(models.Model):
         ('Cancelled', 'Cancelled'),
     ]
 
+    # Statuses that count towards a volunteer's active_task_count
+    ACTIVE_STATUSES = ['Assigned', 'En Route']
+    # Statuses of requests that need no more work
+    CLOSED_STATUSES = ['Completed', 'Cancelled']
+
     requester = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submitted_requests')
     request_type = models.CharField(max_length=50, choices=REQUEST_TYPE_CHOICES)
     description = models.TextField()
@@ -79,11 +189,194 @@ class ReliefRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Geohash of (latitude, longitude); its prefixes are the map clustering cells
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+
+    # Duplicate submissions folded into this request (see core_app/dedup.py)
+    report_count = models.PositiveIntegerField(default=1, editable=False)
+    co_requesters = models.ManyToManyField(User, blank=True, related_name='joined_requests')
+
+    LOCATION_FIELDS = ('latitude', 'longitude')
+
+    class Meta:
+        indexes = [
+            # Volunteer dashboard: open requests in (created_at, id) keyset order
+            models.Index(
+                fields=['created_at', 'id'],
+                name='request_open_created_idx',
+                # Spelled as two NOT terms, the form SQLite can match against the query
+                condition=~models.Q(status='Completed') & ~models.Q(status='Cancelled'),
+            ),
+            # Status filters and the Pending queue (batch assignment), oldest first
+            models.Index(fields=['status', 'created_at', 'id'], name='request_status_created_idx'),
+            # Victim dashboard: a requester's own requests, newest first
+            models.Index(fields=['requester', '-created_at'], name='request_requester_created_idx'),
+            # Active-task counting per volunteer
+            models.Index(fields=['assigned_to_volunteer', 'status'], name='request_assignee_status_idx'),
+            # Nearest Pending requests: a few geohash cells, Pending rows only
+            models.Index(
+                fields=['geohash'],
+                name='request_pending_cell_idx',
+                condition=models.Q(status='Pending'),
+                opclasses=['varchar_pattern_ops'],  # LIKE 'prefix%' on PostgreSQL
+            ),
+            # Duplicate detection: open requests of one type in a few geohash cells
+            models.Index(
+                fields=['request_type', 'geohash'],
+                name='request_open_type_cell_idx',
+                condition=~models.Q(status__in=['Completed', 'Cancelled']),
+                opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'],  # LIKE 'prefix%' on PostgreSQL
+            ),
+        ]
+
     def __str__(self):
         return f"{self.get_request_type_display()} request by {self.requester.username} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        """
+        Save and, in the same transaction, move the request between its old and
+        new assignee's active_task_count if the assignee or status changed. The
+        old values are read from the row under a lock, so saves over a stale
+        copy keep the counts exact. Keeps geohash in step with latitude/longitude.
+        """
+        adding = self._state.adding
+        loaded = dict(getattr(self, '_loaded_values', None) or {})
+        if adding or not loaded or set(self.LOCATION_FIELDS) & self.dirty_fields():
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        update_fields = kwargs.get('update_fields')
+        counted = ('assigned_to_volunteer_id', 'status')
+
+        def written(name):
+            if update_fields is None:
+                return name in self.__dict__  # deferred fields are not saved
+            return name in update_fields or name.removesuffix('_id') in update_fields
+
+        with transaction.atomic():
+            before = (None, None)
+            if not adding:
+                if not any(written(name) for name in counted):
+                    super().save(*args, **kwargs)
+                    return
+                # The stored values, not the ones this instance was loaded with: another
+                # save may have changed them since, and the row lock keeps them current
+                before = (
+                    ReliefRequest.objects.select_for_update().filter(pk=self.pk)
+                    .values_list(*counted).first()
+                ) or (None, None)
+            super().save(*args, **kwargs)
+
+            after = tuple(
+                self.__dict__[name] if adding or written(name) else old
+                for name, old in zip(counted, before)
+            )
+            if before == after:
+                return
+
+            deltas = {}
+            if before[0] is not None and before[1] in self.ACTIVE_STATUSES:
+                deltas[before[0]] = deltas.get(before[0], 0) - 1
+            if after[0] is not None and after[1] in self.ACTIVE_STATUSES:
+                deltas[after[0]] = deltas.get(after[0], 0) + 1
+            if deltas:
+                Profile.adjust_active_task_counts(deltas)
+
 
-from django.db.models.signals import post_save
+
+class AssignmentJob(models.Model):
+    """
+    A queued auto-assignment, run by the assignment_worker command (see
+    core_app/jobs.py): either of one relief request, or a batch assignment of
+    every Pending request.
+    """
+    KIND_CHOICES = [
+        ('request', 'Single request'),
+        ('batch', 'All pending requests'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    OPEN_STATUSES = ['queued', 'running']
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='request')
+    relief_request = models.ForeignKey(
+        ReliefRequest, on_delete=models.CASCADE, null=True, blank=True, related_name='assignment_jobs',
+    )  # empty for batch jobs
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)  # not claimed before this (retry backoff)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    result = models.CharField(max_length=255, blank=True)  # outcome or last error, for the dashboard
+    assigned_volunteer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due jobs
+            models.Index(fields=['status', 'run_after', 'id'], name='job_status_run_after_idx'),
+        ]
+        constraints = [
+            # At most one queued/running job per request, so repeated clicks don't pile up
+            models.UniqueConstraint(
+                fields=['relief_request'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='job_one_open_per_request',
+            ),
+            # At most one queued/running batch: a second one would only find the same requests
+            models.UniqueConstraint(
+                fields=['kind'],
+                condition=models.Q(kind='batch', status__in=['queued', 'running']),
+                name='job_one_open_batch',
+            ),
+        ]
+
+    def __str__(self):
+        if self.kind == 'batch':
+            return f"Batch assignment job #{self.id} ({self.status})"
+        return f"Assignment job #{self.id} for request #{self.relief_request_id} ({self.status})"
+
+
+class ArchivedReliefRequest(models.Model):
+    """
+    A closed relief request moved out of the live table by the archive_requests
+    command (see core_app/archive.py). Same id and columns as the ReliefRequest
+    it replaced, so history pages and exports can read both alike.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    requester = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_requests')
+    request_type = models.CharField(max_length=50, choices=ReliefRequest.REQUEST_TYPE_CHOICES)
+    description = models.TextField()
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    status = models.CharField(max_length=20, choices=ReliefRequest.STATUS_CHOICES)
+    assigned_to_volunteer = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_tasks'
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    geohash = models.CharField(max_length=12, blank=True)
+    report_count = models.PositiveIntegerField(default=1)
+    co_requesters = models.ManyToManyField(User, blank=True, related_name='joined_archived_requests')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Victim dashboard history: a requester's own requests, newest first
+            models.Index(fields=['requester', '-created_at'], name='archived_requester_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_request_type_display()} request by {self.requester.username} ({self.status}, archived)"
+
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
@@ -92,15 +385,108 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
     """
     Ensure a Profile exists for every User.
     - Creates a Profile when a new User is created.
-    - Saves Profile when User is saved (keeps things in sync).
+    - Saves the cached Profile when User is saved, only if it has unsaved changes.
     """
     if created:
         # default role could be left blank or set to 'victim' by default
         Profile.objects.create(user=instance, role='victim', phone_number='')
-    else:
-        # if a profile exists, save it (no-op if nothing changed)
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # login() only touches last_login; nothing to sync
+        return
+
+    if User.profile.is_cached(instance):
         try:
-            instance.profile.save()
+            profile = instance.profile
         except Profile.DoesNotExist:
-            # create if missing for any reason
-            Profile.objects.create(user=instance, role='victim', phone_number='')
\ No newline at end of file
+            Profile.objects.create(user=instance, role='victim', phone_number='')
+            return
+        dirty = profile.dirty_fields()
+        if dirty:
+            profile.save(update_fields=dirty)
+    elif not Profile.objects.filter(user=instance).exists():
+        # create if missing for any reason
+        Profile.objects.create(user=instance, role='victim', phone_number='')
+
+
+def update_last_login_throttled(sender, user, **kwargs):
+    """
+    user_logged_in receiver replacing django.contrib.auth's update_last_login
+    (see CoreAppConfig.ready). Writes last_login at most once per
+    LAST_LOGIN_UPDATE_INTERVAL seconds, with a bare UPDATE so no post_save
+    handlers run during a login storm.
+
+    Trade-off: Django's password reset tokens are invalidated by a change of
+    last_login, so a token issued less than the interval after the last stored
+    login survives the user's next login (it still expires after
+    PASSWORD_RESET_TIMEOUT and on any password change). The app sends no reset
+    emails; a deployment that adds django.contrib.auth's reset views should set
+    the interval to 0.
+    """
+    now = timezone.now()
+    interval = getattr(settings, 'LAST_LOGIN_UPDATE_INTERVAL', 0)
+    if user.last_login and interval and (now - user.last_login).total_seconds() < interval:
+        return
+    User.objects.filter(pk=user.pk).update(last_login=now)
+    user.last_login = now
+
+
+@receiver(post_save, sender=ReliefRequest)
+def publish_relief_request_change(sender, instance, created, **kwargs):
+    """Push request changes to the live dashboard feed (see core_app/events.py)."""
+    from . import events
+
+    if not events.enabled():
+        return
+    payload = functools.partial(events.request_payload, instance)  # loads requester and volunteer
+
+    if created:
+        events.publish('request.created', payload)
+        return
+
+    changes = getattr(instance, 'saved_changes', {})
+    if 'assigned_to_volunteer_id' in changes:
+        events.publish('request.assigned', payload)
+    elif 'status' in changes:
+        events.publish('request.status', payload)
+
+
+
+def _evict_spatial_caches(points):
+    from . import clusters, nearby
+
+    clusters.invalidate_points(points)
+    nearby.invalidate_points(points)
+
+
+@receiver(post_save, sender=ReliefRequest)
+def evict_spatial_caches_on_save(sender, instance, created, **kwargs):
+    """
+    Drop cached map tiles and nearest-request lists this save changed
+    (see core_app/clusters.py and core_app/nearby.py).
+    """
+    points = [(instance.latitude, instance.longitude)]
+    if not created:
+        changes = getattr(instance, 'saved_changes', {})
+        if not {'latitude', 'longitude', 'status', 'request_type'} & changes.keys():
+            return
+        points.append((
+            changes.get('latitude', instance.latitude),
+            changes.get('longitude', instance.longitude),
+        ))
+    transaction.on_commit(lambda: _evict_spatial_caches(points))
+
+
+@receiver(post_delete, sender=ReliefRequest)
+def evict_spatial_caches_on_delete(sender, instance, **kwargs):
+    points = [(instance.latitude, instance.longitude)]
+    transaction.on_commit(lambda: _evict_spatial_caches(points))
+
+
+@receiver(post_delete, sender=ReliefRequest)
+def release_active_task(sender, instance, **kwargs):
+    """Deleting an active request frees a slot for its assignee."""
+    if instance.assigned_to_volunteer_id and instance.status in ReliefRequest.ACTIVE_STATUSES:
+        Profile.adjust_active_task_counts({instance.assigned_to_volunteer_id: -1})
@@ -0,0 +1,75 @@
+# core_app/mongo.py
+"""
+Process-wide MongoDB client.
+
+MongoClient owns a connection pool and background monitor threads, so it must
+be created once per process and reused, not built per request. The client is
+created lazily on first use and re-created after a fork (e.g. gunicorn
+pre-fork workers), because pymongo clients are not fork-safe.
+"""
+import atexit
+import os
+import threading
+
+from django.conf import settings
+from pymongo import MongoClient
+
+from .metrics import MongoCommandListener
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def _build_client():
+    return MongoClient(
+        settings.MONGO_URI,
+        maxPoolSize=getattr(settings, 'MONGO_MAX_POOL_SIZE', 100),
+        minPoolSize=getattr(settings, 'MONGO_MIN_POOL_SIZE', 0),
+        maxIdleTimeMS=getattr(settings, 'MONGO_MAX_IDLE_TIME_MS', None),
+        connectTimeoutMS=getattr(settings, 'MONGO_CONNECT_TIMEOUT_MS', 20000),
+        socketTimeoutMS=getattr(settings, 'MONGO_SOCKET_TIMEOUT_MS', None),
+        serverSelectionTimeoutMS=getattr(settings, 'MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000),
+        connect=False,  # don't open sockets until the first operation
+        tz_aware=True,  # datetimes come back as aware UTC, comparable with timezone.now()
+        event_listeners=[MongoCommandListener()],
+    )
+
+
+def get_client():
+    """Return the shared MongoClient for the current process."""
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != pid:
+            # After a fork the inherited client belongs to the parent; drop the
+            # reference without closing it and build a fresh pool for this worker.
+            _client = _build_client()
+            _client_pid = pid
+    return _client
+
+
+def get_database():
+    return get_client()[settings.MONGO_DB_NAME]
+
+
+def get_collection(collection_name):
+    return get_database()[collection_name]
+
+
+def close_client():
+    """Close the shared client (called automatically at interpreter shutdown)."""
+    global _client, _client_pid
+
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+atexit.register(close_client)
@@ -0,0 +1,137 @@
+# core_app/nearby.py
+"""
+"Nearest Pending requests to me" for volunteers.
+
+Volunteers are grouped by the geohash cell (NEARBY_CELL_PRECISION) they stand
+in. For each cell and type filter we cache a candidate list: every Pending
+request close enough to the cell that it could be among the k nearest for
+any point inside it. The list is found with the usual SQL prefilter (indexed
+geohash prefixes plus a lat/lon box), widening the radius until k requests
+turn up. Each volunteer then ranks the small cached list by exact haversine
+distance from their own position.
+
+Cached lists are tied to coarse region versions (geohash prefixes of
+NEARBY_REGION_PRECISION). Creating, moving, re-typing, deleting or changing
+the status of a request bumps the version of its region, which invalidates
+every cached list whose search area touches that region.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from . import cacheversion
+from .geo import bounding_box, cell_bounds, cells_in_bbox, cells_filter, encode_geohash
+from .models import ReliefRequest
+from .services import calculate_distance, distance_matrix
+
+
+def _cache():
+    return caches[getattr(settings, 'NEARBY_CACHE_ALIAS', 'default')]
+
+
+def _region_key(region):
+    return f'nearby:region:{region}'
+
+
+def _pending_in_bbox(bbox, request_types):
+    min_lat, max_lat, min_lon, max_lon = bbox
+    queryset = ReliefRequest.objects.filter(
+        cells_filter(bbox),
+        status='Pending',
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lon, max_lon),
+    )
+    if request_types:
+        queryset = queryset.filter(request_type__in=request_types)
+    return list(queryset.values_list(
+        'id', 'request_type', 'latitude', 'longitude', 'created_at', 'requester__username',
+    ))
+
+
+def _search_area(cell):
+    """Centre of `cell` and the distance (km) from it to the cell's farthest corner."""
+    min_lat, max_lat, min_lon, max_lon = cell_bounds(cell)
+    center = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+    return center, calculate_distance(center[0], center[1], max_lat, max_lon)
+
+
+def _candidates(cell, k, request_types):
+    """Pending requests that can be among the k nearest for any point in `cell`."""
+    (lat, lon), half_diagonal = _search_area(cell)
+    radius = getattr(settings, 'NEARBY_SEARCH_RADIUS_KM', 5)
+    max_radius = getattr(settings, 'NEARBY_MAX_RADIUS_KM', 50)
+    while True:
+        # If k requests lie within `radius` of the centre, the k nearest of any
+        # point in the cell lie within radius + 2 * half_diagonal of the centre
+        rows = _pending_in_bbox(bounding_box(lat, lon, radius + 2 * half_diagonal), request_types)
+        if rows:
+            distances = distance_matrix((lat, lon), [(row[2], row[3]) for row in rows])[0]
+            within = sum(1 for d in distances if d <= radius)
+        else:
+            within = 0
+        if within >= k or radius >= max_radius:
+            return rows
+        radius = min(radius * 2, max_radius)
+
+
+def _regions(cell):
+    """Coarse regions any search from `cell` can reach; their versions guard the cached list."""
+    (lat, lon), half_diagonal = _search_area(cell)
+    max_radius = getattr(settings, 'NEARBY_MAX_RADIUS_KM', 50)
+    return cells_in_bbox(
+        bounding_box(lat, lon, max_radius + 2 * half_diagonal),
+        getattr(settings, 'NEARBY_REGION_PRECISION', 3),
+    )
+
+
+def _cached_candidates(cell, k, request_types):
+    cache = _cache()
+    key = f"nearby:{cell}:{k}:{','.join(request_types)}"
+
+    entry = cache.get(key)
+    if entry is not None:
+        current = cache.get_many([_region_key(r) for r in entry['versions']])
+        if all(current.get(_region_key(r)) == v for r, v in entry['versions'].items()):
+            return entry['rows']
+
+    # Versions are read before querying, so a change made meanwhile invalidates this entry
+    regions = _regions(cell)
+    current = cache.get_many([_region_key(r) for r in regions])
+    versions = {r: current.get(_region_key(r)) for r in regions}
+    rows = _candidates(cell, k, request_types)
+    cache.set(key, {'versions': versions, 'rows': rows}, getattr(settings, 'NEARBY_CACHE_TTL', 60))
+    return rows
+
+
+def nearest_pending(lat, lon, k=10, request_types=None):
+    """
+    The `k` Pending requests nearest to (lat, lon), optionally only those of
+    `request_types`, as dicts with their exact distance_km, nearest first.
+    """
+    cell = encode_geohash(lat, lon, getattr(settings, 'NEARBY_CELL_PRECISION', 5))
+    rows = _cached_candidates(cell, k, tuple(sorted(request_types or ())))
+    if not rows:
+        return []
+
+    distances = distance_matrix((lat, lon), [(row[2], row[3]) for row in rows])[0]
+    ranked = sorted(zip(distances, rows), key=lambda pair: (pair[0], pair[1][0]))[:k]
+    return [
+        {
+            'id': request_id,
+            'request_type': request_type,
+            'latitude': float(r_lat),
+            'longitude': float(r_lon),
+            'distance_km': round(distance, 3),
+            'created_at': created_at.isoformat(),
+            'requester': requester,
+        }
+        for distance, (request_id, request_type, r_lat, r_lon, created_at, requester) in ranked
+    ]
+
+
+def invalidate_points(points):
+    """Bump the region version of every (lat, lon) in `points`."""
+    cache = _cache()
+    precision = getattr(settings, 'NEARBY_REGION_PRECISION', 3)
+    regions = {encode_geohash(lat, lon, precision) for lat, lon in points if lat is not None and lon is not None}
+    for region in regions:
+        cacheversion.bump(cache, _region_key(region))
@@ -0,0 +1,74 @@
+# core_app/pagecache.py
+"""
+In-process full-page cache for anonymous visitors.
+
+A page is rendered once per content version and kept in memory as bytes with
+a strong ETag (a hash of the body). Later anonymous hits are served straight
+from memory, or answered with 304 Not Modified when the browser already has
+that version. Logged-in users and visitors with pending flash messages get a
+fresh render, since their page differs.
+
+Each worker keeps its own copy. An entry is rebuilt when its version changes
+or after PAGE_CACHE_TTL seconds, so workers that never see the version bump
+(no shared alerts cache) still catch up.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+_pages = {}  # name -> (version, expires_at, content, content_type, etag)
+_lock = threading.Lock()
+
+
+def _cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))  # len() doesn't consume them
+    )
+
+
+def cached_page(request, name, version, build):
+    """
+    Serve page `name` at content `version` from memory for anonymous visitors.
+    `build(request)` renders the page (an HttpResponse) on a miss or for
+    visitors who can't be served from cache.
+    """
+    if not _cacheable(request):
+        response = build(request)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    now = time.monotonic()
+    entry = _pages.get(name)
+    if entry is None or entry[0] != version or entry[1] <= now:
+        rendered = build(request)
+        if rendered.status_code != 200:
+            return rendered
+        content = rendered.content
+        etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+        entry = (version, now + getattr(settings, 'PAGE_CACHE_TTL', 30), content, rendered['Content-Type'], etag)
+        with _lock:
+            _pages[name] = entry
+
+    _, _, content, content_type, etag = entry
+    not_modified = get_conditional_response(request, etag=etag)
+    response = not_modified if not_modified is not None else HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'PAGE_CACHE_MAX_AGE', 10))
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def clear(name=None):
+    """Drop one cached page (or all of them) in this worker."""
+    with _lock:
+        if name is None:
+            _pages.clear()
+        else:
+            _pages.pop(name, None)
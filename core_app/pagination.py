@@ -0,0 +1,106 @@
+# core_app/pagination.py
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+Unlike OFFSET pagination, fetching page N costs the same as page 1: the cursor
+holds the last row's sort key and the next page is `WHERE (created_at, id) > cursor`,
+which the database answers with an index range scan.
+
+Also EstimatedCountPaginator, for the admin: an exact COUNT(*) of a large
+unfiltered table scans all of it, so PostgreSQL's planner estimate is used instead.
+"""
+import base64
+import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def encode_position(*values):
+    """An opaque, URL-safe cursor holding a sort key, e.g. (created_at.isoformat(), pk)."""
+    raw = '|'.join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_position(cursor, *parsers):
+    """
+    The sort key in a cursor from encode_position(), each part converted by its
+    parser, or None if the cursor is missing or invalid (a parser raised ValueError).
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        if len(parts) != len(parsers):
+            return None
+        return tuple(parse(part) for parse, part in zip(parsers, parts))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def encode_cursor(obj):
+    return encode_position(obj.created_at.isoformat(), obj.pk)
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor string, or None if it is missing or invalid."""
+    return decode_position(cursor, datetime.datetime.fromisoformat, int)
+
+
+def keyset_page(queryset, cursor=None, page_size=50):
+    """
+    Return (rows, next_cursor) for the page after `cursor`, ordered by (created_at, id).
+    next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by('created_at', 'id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        )
+
+    # Fetch one extra row to know whether there is a next page without a COUNT(*)
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def estimated_count(queryset):
+    """
+    PostgreSQL's row estimate for an unfiltered queryset's table, or None when
+    the queryset is filtered, the estimate is unknown, or the database isn't PostgreSQL.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor != 'postgresql' or query.where or query.distinct or query.combinator:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 (or 0) until the table has been vacuumed or analyzed
+    return row[0] if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the planner's row estimate for unfiltered tables
+    larger than ADMIN_ESTIMATED_COUNT_THRESHOLD rows; filtered lists and
+    smaller tables are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000):
+            return estimate
+        return super().count
@@ -1,30 +1,160 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Count, Q, Case, When, IntegerField
+from django.db import transaction
+from django.db.models import F, Case, When, IntegerField
+from django.db.models.lookups import GreaterThan
+from django.db.models.functions import Coalesce
 from math import radians, sin, cos, sqrt, atan2
 
-ACTIVE_STATUSES = ['Assigned', 'En Route']
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; distance_matrix falls back to pure Python
+    np = None
+
+from .geo import bounding_box, cells_filter
+from .metrics import timed
+from .skills import skill_bit
+from .models import Profile, ReliefRequest
+
+ACTIVE_STATUSES = ReliefRequest.ACTIVE_STATUSES
+EARTH_RADIUS_KM = 6371.0
+NO_LOCATION_DISTANCE_KM = 99999  # ranking distance for volunteers without a location
+# Distances are snapped to this grid (1 mm) so that libm and NumPy, which can
+# differ in the last bit, return the same values and rank ties the same way
+DISTANCE_SCALE = 1e6
 
 # Simple haversine distance in kilometers
 def calculate_distance(lat1, lon1, lat2, lon2):
     if None in (lat1, lon1, lat2, lon2):
         return None
-    R = 6371.0  # Earth radius in km
+    R = EARTH_RADIUS_KM
     dlat = radians(float(lat2) - float(lat1))
     dlon = radians(float(lon2) - float(lon1))
     a = sin(dlat / 2)**2 + cos(radians(float(lat1))) * cos(radians(float(lat2))) * sin(dlon / 2)**2
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
+    # round() to an integer is round-half-even, like np.rint in distance_array()
+    return round(R * c * DISTANCE_SCALE) / DISTANCE_SCALE
+
+
+def _as_points(points):
+    """Accept a single (lat, lon) pair or a sequence of pairs."""
+    points = list(points)
+    if len(points) == 2 and not isinstance(points[0], (list, tuple)):
+        return [tuple(points)]
+    return [tuple(p) for p in points]
+
+
+def _distance_matrix_python(origins, destinations):
+    return [
+        [calculate_distance(o_lat, o_lon, d_lat, d_lon) for d_lat, d_lon in destinations]
+        for o_lat, o_lon in origins
+    ]
+
+
+def _to_array(points):
+    return np.array(
+        [[np.nan if v is None else float(v) for v in p] for p in points],
+        dtype=float,
+    ).reshape(-1, 2)
 
 
-def choose_best_volunteer(relief_request, max_active_tasks: int = 1) -> User | None:
+def distance_array(origins, destinations):
     """
-    Choose best volunteer considering:
-      - volunteer role
-      - fewest active tasks
-      - skill relevance
-      - geographic proximity
+    NumPy version of distance_matrix(): takes (n, 2) and (m, 2) arrays (or
+    sequences of pairs) of degrees and returns an (n, m) float array in km,
+    with NaN where a coordinate is missing. Requires NumPy.
+    """
+    o = origins if isinstance(origins, np.ndarray) else _to_array(origins)
+    d = destinations if isinstance(destinations, np.ndarray) else _to_array(destinations)
+    lat1, lon1 = o[:, 0][:, None], o[:, 1][:, None]
+    lat2, lon2 = d[:, 0][None, :], d[:, 1][None, :]
+
+    # Same formula and operation order as calculate_distance()
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1)
+    a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return np.rint(EARTH_RADIUS_KM * c * DISTANCE_SCALE) / DISTANCE_SCALE
+
+
+def _distance_matrix_numpy(origins, destinations):
+    dist = distance_array(origins, destinations)
+    return [[None if v != v else v for v in row] for row in dist.tolist()]  # NaN -> None
+
+
+def distance_matrix(origins, destinations, use_numpy=None):
+    """
+    Haversine distances in km between every origin and every destination.
+
+    `origins` is one (lat, lon) pair or a sequence of pairs; `destinations` is a
+    sequence of pairs. Returns a list of rows, one per origin, with None where a
+    coordinate is missing. Uses NumPy in a single vectorised pass when available;
+    the pure-Python fallback gives identical values (both are snapped to 1 mm).
+    """
+    origins = _as_points(origins)
+    destinations = [tuple(p) for p in destinations]
+    if not origins or not destinations:
+        return [[] for _ in origins]
+
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _distance_matrix_numpy(origins, destinations)
+    return _distance_matrix_python(origins, destinations)
+
+
+def volunteers_near(queryset, lat, lon, radius_km):
+    """
+    Restrict a User queryset to volunteers whose profile lies in the bounding box
+    of a `radius_km` circle around (lat, lon). Both filters run in SQL: indexed
+    geohash prefix scans for the covering cells plus an exact lat/lon range.
+    """
+    min_lat, max_lat, min_lon, max_lon = bbox = bounding_box(lat, lon, radius_km)
+    return queryset.filter(
+        cells_filter(bbox, 'profile__geohash'),
+        profile__latitude__range=(min_lat, max_lat),
+        profile__longitude__range=(min_lon, max_lon),
+    )
+
+
+def _candidate_volunteers(relief_request, base_qs, max_active_tasks):
+    """
+    Fetch the volunteers worth ranking for this request.
+
+    Starts with a small radius around the request and doubles it until at least
+    VOLUNTEER_SEARCH_K volunteers with spare capacity are found, so the cost
+    depends on local density rather than the size of the whole roster. Falls back
+    to every volunteer (including those without a location) if nobody with spare
+    capacity is within VOLUNTEER_SEARCH_MAX_RADIUS_KM.
+    """
+    if relief_request.latitude is None or relief_request.longitude is None:
+        return list(base_qs)
+
+    k = getattr(settings, 'VOLUNTEER_SEARCH_K', 20)
+    radius = getattr(settings, 'VOLUNTEER_SEARCH_RADIUS_KM', 5)
+    max_radius = getattr(settings, 'VOLUNTEER_SEARCH_MAX_RADIUS_KM', 200)
+
+    while True:
+        nearby = list(volunteers_near(base_qs, relief_request.latitude, relief_request.longitude, radius))
+        available = sum(1 for v in nearby if v.active_tasks < max_active_tasks)
+        if available >= k or radius >= max_radius:
+            break
+        radius = min(radius * 2, max_radius)
+
+    if available:
+        return nearby
+    return list(base_qs)
+
+
+def eligible_volunteers(request_type=None):
+    """
+    Active staff users with their profile, annotated with `is_volunteer_role`
+    (0 for volunteers, 1 for other staff) and `active_tasks`.
+
+    With `request_type`, also annotated with `skill_match` (1 if the profile's
+    skill_tags cover that category, else 0) and ordered skilled volunteers first.
     """
-    base_qs = (
+    volunteers = (
         User.objects.filter(
             is_active=True,
             is_staff=True,
@@ -36,44 +166,105 @@ def choose_best_volunteer(relief_request, max_active_tasks: int = 1) -> User | N
                 default=1,
                 output_field=IntegerField(),
             ),
-            active_tasks=Count(
-                'assigned_tasks',
-                filter=Q(assigned_tasks__status__in=ACTIVE_STATUSES),
-            ),
+            # Denormalised counter kept exact by ReliefRequest.save()
+            active_tasks=Coalesce(F('profile__active_task_count'), 0),
         )
-        .order_by('is_volunteer_role', 'active_tasks', 'id')
     )
+    if request_type is None:
+        return volunteers.order_by('is_volunteer_role', 'active_tasks', 'id')
 
-    if not base_qs.exists():
-        return None
+    return volunteers.annotate(
+        skill_match=Case(
+            When(GreaterThan(F('profile__skill_tags').bitand(skill_bit(request_type)), 0), then=1),
+            default=0,
+            output_field=IntegerField(),
+        ),
+    ).order_by('-skill_match', 'is_volunteer_role', 'active_tasks', 'id')
 
-    # Compute skill relevance & distance
-    candidates = []
-    for volunteer in base_qs:
-        profile = getattr(volunteer, "profile", None)
-        if not profile:
-            continue
-
-        # --- Skill matching ---
-        skills_text = (profile.skills_bio or "").lower()
-        request_type = relief_request.request_type.lower()
-        skill_match = request_type in skills_text  # simple relevance flag
-
-        # --- Distance calculation ---
-        distance = None
-        if profile.latitude and profile.longitude:
-            distance = calculate_distance(
-                relief_request.latitude,
-                relief_request.longitude,
-                profile.latitude,
-                profile.longitude,
+
+def reconcile_active_task_counts(batch_size=1000, dry_run=False):
+    """
+    Recompute Profile.active_task_count from ReliefRequest and fix any drift.
+
+    Works through profiles in batches; each batch locks its profile rows and
+    counts their active requests in the same transaction, so concurrent
+    assignments are neither lost nor double counted. Returns a list of
+    (user_id, stored_count, actual_count) for every corrected profile.
+    """
+    from django.db.models import Count
+
+    fixes = []
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Profile.objects.select_for_update()
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'user_id', 'active_task_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            actual = dict(
+                ReliefRequest.objects.filter(
+                    status__in=ACTIVE_STATUSES,
+                    assigned_to_volunteer__in=[p.user_id for p in batch],
+                )
+                .values('assigned_to_volunteer')
+                .annotate(n=Count('id'))
+                .values_list('assigned_to_volunteer', 'n')
             )
+            drifted = []
+            for profile in batch:
+                count = actual.get(profile.user_id, 0)
+                if profile.active_task_count != count:
+                    fixes.append((profile.user_id, profile.active_task_count, count))
+                    profile.active_task_count = count
+                    drifted.append(profile)
+            if drifted and not dry_run:
+                Profile.objects.bulk_update(drifted, ['active_task_count'])
+    return fixes
+
 
+@timed('choose_best_volunteer')
+def choose_best_volunteer(relief_request, max_active_tasks: int = 1, exclude=()) -> User | None:
+    """
+    Choose best volunteer considering:
+      - volunteer role
+      - fewest active tasks
+      - skill relevance
+      - geographic proximity
+    Users whose ids are in `exclude` are skipped.
+    """
+    base_qs = eligible_volunteers(relief_request.request_type)
+    if exclude:
+        base_qs = base_qs.exclude(id__in=exclude)
+
+    volunteers = [
+        v for v in _candidate_volunteers(relief_request, base_qs, max_active_tasks)
+        if getattr(v, "profile", None)
+    ]
+
+    # --- Distance calculation (one vectorised pass for all candidates) ---
+    distances = distance_matrix(
+        (relief_request.latitude, relief_request.longitude),
+        [
+            (v.profile.latitude, v.profile.longitude)
+            if v.profile.latitude and v.profile.longitude else (None, None)
+            for v in volunteers
+        ],
+    )[0] if volunteers else []
+
+    # Skill relevance comes precomputed from SQL (skill_tags bitmask)
+    candidates = []
+    for volunteer, distance in zip(volunteers, distances):
         # Weighting logic
         candidates.append({
             "volunteer": volunteer,
-            "skill_match": skill_match,
-            "distance": distance if distance is not None else 99999,  # fallback
+            "skill_match": bool(volunteer.skill_match),
+            "distance": distance if distance is not None else NO_LOCATION_DISTANCE_KM,  # fallback
             "active_tasks": volunteer.active_tasks,
             "is_volunteer_role": volunteer.is_volunteer_role,
         })
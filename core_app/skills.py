@@ -0,0 +1,110 @@
+# core_app/skills.py
+"""
+Skill tags: a volunteer's free-text skills_bio parsed into request categories.
+
+Profile.save() parses skills_bio once into `skill_tags`, a bitmask with one bit
+per ReliefRequest.REQUEST_TYPE_CHOICES category, so ranking can test "does
+this volunteer cover Medical?" with a bitwise AND in SQL instead of scanning
+every bio on every assignment.
+
+A category matches when the bio contains one of its synonyms at the start of a
+word ("doctor" also matches "doctors"). SKILL_SYNONYMS in settings overrides
+the synonym list of any category.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+
+DEFAULT_SKILL_SYNONYMS = {
+    'Medical': ['medical', 'medic', 'doctor', 'physician', 'nurse', 'nursing', 'paramedic', 'emt',
+                'first aid', 'pharmac', 'surgeon', 'ambulance'],
+    'Food': ['food', 'cook', 'chef', 'meal', 'kitchen', 'catering', 'ration', 'nutrition'],
+    'Water': ['water', 'sanitation', 'purif', 'plumb', 'hygiene'],
+    'Shelter': ['shelter', 'carpent', 'construct', 'builder', 'tent', 'housing', 'mason'],
+    'Rescue': ['rescue', 'search', 'swim', 'lifeguard', 'boat', 'diver', 'firefight', 'evacuat'],
+    'Other': ['other', 'logistic', 'driv', 'translat', 'general'],
+}
+
+
+def _categories():
+    from .models import ReliefRequest
+    return [value for value, _ in ReliefRequest.REQUEST_TYPE_CHOICES]
+
+
+def skill_bit(request_type):
+    """The skill_tags bit for a request type (0 for unknown types)."""
+    try:
+        return 1 << _categories().index(request_type)
+    except ValueError:
+        return 0
+
+
+@lru_cache(maxsize=1)
+def _patterns():
+    synonyms = {**DEFAULT_SKILL_SYNONYMS, **getattr(settings, 'SKILL_SYNONYMS', {})}
+    patterns = []
+    for category in _categories():
+        words = synonyms.get(category) or [category]
+        alternation = '|'.join(re.escape(w.lower()) for w in sorted(words, key=len, reverse=True))
+        patterns.append((skill_bit(category), re.compile(rf'\b(?:{alternation})')))
+    return patterns
+
+
+@receiver(setting_changed)
+def _reset_patterns(setting, **kwargs):
+    if setting == 'SKILL_SYNONYMS':
+        _patterns.cache_clear()
+
+
+def parse_skill_tags(text):
+    """Bitmask of the categories mentioned in `text`."""
+    text = (text or '').lower()
+    if not text:
+        return 0
+    mask = 0
+    for bit, pattern in _patterns():
+        if pattern.search(text):
+            mask |= bit
+    return mask
+
+
+def skill_names(mask):
+    """Category names set in a skill_tags bitmask."""
+    return [category for category in _categories() if mask & skill_bit(category)]
+
+
+def reindex_skill_tags(batch_size=1000, dry_run=False):
+    """
+    Re-parse every profile's skills_bio (e.g. after changing SKILL_SYNONYMS)
+    and store the tags that changed, one bulk_update per batch of profiles.
+    Returns the number of profiles whose tags changed.
+    """
+    from .models import Profile
+
+    changed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Profile.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', 'skills_bio', 'skill_tags')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        stale = []
+        for profile in batch:
+            tags = parse_skill_tags(profile.skills_bio)
+            if profile.skill_tags != tags:
+                profile.skill_tags = tags
+                stale.append(profile)
+        changed += len(stale)
+        if stale and not dry_run:
+            with transaction.atomic():
+                Profile.objects.bulk_update(stale, ['skill_tags'])
+    return changed
@@ -1,3 +1,766 @@
-from django.test import TestCase
+import datetime
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import alerts, jobs, locations, metrics
+from .db_router import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, primary
+from .models import ArchivedReliefRequest, AssignmentJob, Profile, ReliefRequest
+from .services import distance_matrix, np
+from .skills import parse_skill_tags
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Query-plan regression checks: each hot ReliefRequest query must be answered
+    from its index, so schema or query changes can't silently fall back to
+    sequential scans.
+
+    The seeded table is small, so on PostgreSQL sequential scans are disabled
+    for the test; the check is that the planner *can* use the index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.victims = [User.objects.create_user(f'victim{i}') for i in range(20)]
+        cls.volunteers = [User.objects.create_user(f'volunteer{i}', is_staff=True) for i in range(10)]
+
+        statuses = [s for s, _ in ReliefRequest.STATUS_CHOICES]
+        types = [t for t, _ in ReliefRequest.REQUEST_TYPE_CHOICES]
+        start = timezone.now() - datetime.timedelta(days=30)
+        requests = []
+        for i in range(2000):
+            status = statuses[i % len(statuses)]
+            requests.append(ReliefRequest(
+                requester=cls.victims[i % len(cls.victims)],
+                request_type=types[i % len(types)],
+                description='seeded',
+                latitude=28 + (i % 100) / 100,
+                longitude=77 + (i % 100) / 100,
+                status=status,
+                assigned_to_volunteer=None if status == 'Pending' else cls.volunteers[i % len(cls.volunteers)],
+            ))
+        ReliefRequest.objects.bulk_create(requests)
+        # auto_now_add ignores explicit values, so spread created_at afterwards
+        for i, pk in enumerate(ReliefRequest.objects.order_by('id').values_list('id', flat=True)):
+            if i % 100 == 0:
+                ReliefRequest.objects.filter(id__gte=pk, id__lt=pk + 100).update(
+                    created_at=start + datetime.timedelta(hours=i // 100)
+                )
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Expected {index_name} in query plan:\n{plan}")
+
+    def test_volunteer_dashboard_open_requests(self):
+        qs = (
+            ReliefRequest.objects.exclude(status='Completed').exclude(status='Cancelled')
+            .order_by('created_at', 'id')[:51]
+        )
+        self.assertUsesIndex(qs, 'request_open_created_idx')
+
+    def test_pending_queue_by_status(self):
+        qs = ReliefRequest.objects.filter(status='Pending').order_by('created_at', 'id')
+        self.assertUsesIndex(qs, 'request_status_created_idx')
+
+    def test_victim_dashboard_own_requests(self):
+        qs = self.victims[0].submitted_requests.all().order_by('-created_at')
+        self.assertUsesIndex(qs, 'request_requester_created_idx')
+
+    def test_active_tasks_per_volunteer(self):
+        qs = ReliefRequest.objects.filter(
+            assigned_to_volunteer=self.volunteers[0],
+            status__in=ReliefRequest.ACTIVE_STATUSES,
+        )
+        self.assertUsesIndex(qs, 'request_assignee_status_idx')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Routing decisions only; no replica database is needed."""
+
+    router = ReplicaRouter()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(ReliefRequest), 'replica')
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(ReliefRequest), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        with primary():
+            self.assertEqual(self.router.db_for_read(ReliefRequest), 'default')
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'core_app'))
+        self.assertTrue(self.router.allow_migrate('default', 'core_app'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.assertEqual(self.router.db_for_read(ReliefRequest), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingMiddlewareTests(TransactionTestCase):
+    """
+    Requests through the middleware against a real second database: a SQLite
+    file standing in for a replica that holds a user the primary does not.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        replica_settings = connections.configure_settings({
+            'default': {}, 'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.replica_path},
+        })['replica']
+        # A connection added at run time rather than in DATABASES, so the test runner leaves it alone
+        replica = load_backend(replica_settings['ENGINE']).DatabaseWrapper(replica_settings, 'replica')
+        setattr(connections._connections, 'replica', replica)
+        # Replicas are never migrated; build the one table used here by hand, as replication would
+        with replica.schema_editor() as editor:
+            editor.create_model(User)
+        User.objects.using('replica').bulk_create([User(username='replica-only')])  # no profile signal
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        delattr(connections._connections, 'replica')
+        os.remove(cls.replica_path)
+        super().tearDownClass()
+
+    def read_view(self, request):
+        return HttpResponse(str(User.objects.filter(username='replica-only').exists()))
+
+    def write_view(self, request):
+        User.objects.create(username='written')
+        return self.read_view(request)
+
+    def get(self, view, method='get', cookies=None):
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.get(self.read_view).content, b'True')
+
+    def test_unsafe_and_sticky_requests_read_from_primary(self):
+        self.assertEqual(self.get(self.read_view, method='post').content, b'False')
+        pinned = {PIN_COOKIE: str(int(datetime.datetime.now().timestamp()) + 60)}
+        self.assertEqual(self.get(self.read_view, cookies=pinned).content, b'False')
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.get(self.write_view, method='post')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertNotIn(PIN_COOKIE, self.get(self.read_view).cookies)
+
+    def test_async_requests_are_routed_too(self):
+        async def read_view(request):
+            return await sync_to_async(self.read_view)(request)
+
+        async def write_view(request):
+            return await sync_to_async(self.write_view)(request)
+
+        def call(view, method):
+            middleware = ReplicaRoutingMiddleware(view)
+            return async_to_sync(middleware)(getattr(RequestFactory(), method)('/'))
+
+        self.assertEqual(call(read_view, 'get').content, b'True')
+        response = call(write_view, 'post')
+        self.assertEqual(response.content, b'False')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class DistanceMatrixTests(SimpleTestCase):
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy_and_python_paths_agree_exactly(self):
+        rng = random.Random(4)
+        origins = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(30)]
+        destinations = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(30)]
+        # Near pairs too, where ranking ties matter most
+        destinations += [(lat + rng.uniform(-0.01, 0.01), lon + rng.uniform(-0.01, 0.01)) for lat, lon in origins]
+        destinations.append((None, 77.0))
+        self.assertEqual(
+            distance_matrix(origins, destinations, use_numpy=True),
+            distance_matrix(origins, destinations, use_numpy=False),
+        )
+
+
+class ProfileChangeTrackingTests(TestCase):
+    """TrackChangesMixin on Profile, and the User post_save handler that relies on it."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('volunteer', password='x', is_staff=True)
+        Profile.objects.filter(user=self.user).update(role='volunteer')
+
+    def load_profile(self):
+        return Profile.objects.get(user=self.user)
+
+    def test_dirty_fields(self):
+        profile = self.load_profile()
+        self.assertEqual(profile.dirty_fields(), set())
+        profile.phone_number = '555'
+        profile.role = 'volunteer'  # same value: not dirty
+        self.assertEqual(profile.dirty_fields(), {'phone_number'})
+        profile.save()
+        self.assertEqual(profile.saved_changes, {'phone_number': ''})
+        self.assertEqual(profile.dirty_fields(), set())
+
+    def test_unsaved_profile_is_all_dirty(self):
+        profile = Profile(user=self.user, role='victim')
+        self.assertIn('phone_number', profile.dirty_fields())
+
+    def test_fields_left_out_of_update_fields_stay_dirty(self):
+        profile = self.load_profile()
+        profile.phone_number = '555'
+        profile.full_name = 'Asha'
+        profile.save(update_fields=['phone_number'])
+        self.assertEqual(profile.saved_changes, {'phone_number': ''})
+        self.assertEqual(profile.dirty_fields(), {'full_name'})
+        self.assertEqual(self.load_profile().full_name, '')
+
+    def test_update_fields_include_derived_fields(self):
+        profile = self.load_profile()
+        profile.skills_bio = 'nurse, first aid'
+        profile.latitude, profile.longitude = 12.97, 77.59
+        profile.save(update_fields=['skills_bio', 'latitude', 'longitude'])
+
+        stored = self.load_profile()
+        self.assertEqual(stored.skill_tags, parse_skill_tags('nurse, first aid'))
+        self.assertNotEqual(stored.skill_tags, 0)
+        self.assertTrue(stored.geohash)
+        self.assertIsNotNone(stored.location_updated_at)
+
+    def test_full_save_never_writes_active_task_count(self):
+        profile = self.load_profile()
+        Profile.objects.filter(pk=profile.pk).update(active_task_count=3)
+        profile.phone_number = '555'
+        profile.save()
+        self.assertEqual(self.load_profile().active_task_count, 3)
+
+    def test_last_login_save_does_not_touch_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_user_save_with_clean_cached_profile_skips_profile_save(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.first_name = 'Asha'
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_user_save_saves_dirty_cached_profile(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.profile.full_name = 'Asha'
+        user.save()
+        self.assertEqual(self.load_profile().full_name, 'Asha')
+
+
+class ActiveTaskCountTests(TestCase):
+    """Profile.active_task_count must follow every way a request's assignee or status changes."""
+
+    def setUp(self):
+        self.victim = User.objects.create_user('victim')
+        self.alice = User.objects.create_user('alice', is_staff=True)
+        self.bob = User.objects.create_user('bob', is_staff=True)
+
+    def make_request(self, **kwargs):
+        return ReliefRequest.objects.create(
+            requester=self.victim, request_type='Food', description='Need food',
+            latitude=12.97, longitude=77.59, **kwargs,
+        )
+
+    def assertCounts(self, alice, bob):
+        counts = dict(Profile.objects.values_list('user__username', 'active_task_count'))
+        self.assertEqual((counts['alice'], counts['bob']), (alice, bob))
+
+    def test_create(self):
+        self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        self.make_request(assigned_to_volunteer=self.bob, status='Completed')
+        self.make_request()
+        self.assertCounts(1, 0)
+
+    def test_reassign(self):
+        relief_request = self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        relief_request.assigned_to_volunteer = self.bob
+        relief_request.save()
+        self.assertCounts(0, 1)
+
+    def test_status_change(self):
+        relief_request = self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        relief_request.status = 'En Route'
+        relief_request.save(update_fields=['status'])
+        self.assertCounts(1, 0)
+        relief_request.status = 'Completed'
+        relief_request.save(update_fields=['status'])
+        self.assertCounts(0, 0)
+
+    def test_save_with_deferred_fields(self):
+        pk = self.make_request(assigned_to_volunteer=self.alice, status='Assigned').pk
+        relief_request = ReliefRequest.objects.only('id', 'status').get(pk=pk)
+        relief_request.status = 'Completed'
+        relief_request.save()
+        self.assertCounts(0, 0)
+
+        relief_request = ReliefRequest.objects.only('id').get(pk=pk)
+        relief_request.assigned_to_volunteer_id = self.bob.id
+        relief_request.status = 'Assigned'
+        relief_request.save(update_fields=['assigned_to_volunteer', 'status'])
+        self.assertCounts(0, 1)
+
+    def test_save_over_stale_copy(self):
+        pk = self.make_request().pk
+        first = ReliefRequest.objects.get(pk=pk)
+        second = ReliefRequest.objects.get(pk=pk)  # loaded before the first save: Pending, unassigned
+        first.assigned_to_volunteer, first.status = self.alice, 'Assigned'
+        first.save()
+        second.assigned_to_volunteer, second.status = self.bob, 'Assigned'
+        second.save()
+        self.assertCounts(0, 1)
+
+        # A stale full save that only meant to edit the description writes the old assignee back
+        first.description = 'Need food and water'
+        first.save()
+        self.assertCounts(1, 0)
+
+    def test_assign_to_me_when_already_taken(self):
+        relief_request = self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        self.client.force_login(self.bob)
+        self.client.get(f'/request/{relief_request.pk}/assign/')
+        relief_request.refresh_from_db()
+        self.assertEqual(relief_request.assigned_to_volunteer, self.alice)
+        self.assertCounts(1, 0)
+
+    def test_delete(self):
+        relief_request = self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        relief_request.delete()
+        self.assertCounts(0, 0)
+
+    def post_changelist(self, relief_request, status, volunteer):
+        admin_user = User.objects.create_superuser('admin', password='x')
+        self.client.force_login(admin_user)
+        response = self.client.post('/admin/core_app/reliefrequest/', {
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '1',
+            'form-0-id': str(relief_request.pk),
+            'form-0-status': status,
+            'form-0-assigned_to_volunteer': str(volunteer.pk),
+            '_save': 'Save',
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_list_editable_status(self):
+        relief_request = self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        self.post_changelist(relief_request, 'Completed', self.alice)
+        self.assertCounts(0, 0)
+
+    def test_admin_list_editable_assignee(self):
+        relief_request = self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        self.post_changelist(relief_request, 'Assigned', self.bob)
+        self.assertCounts(0, 1)
+
+    def test_bulk_update_requests(self):
+        from .assignment import bulk_update_requests
+
+        self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        self.make_request()
+        bulk_update_requests(ReliefRequest.objects.all(), 'Assigned', volunteer=self.bob)
+        self.assertCounts(0, 2)
+        bulk_update_requests(ReliefRequest.objects.all(), 'Cancelled')
+        self.assertCounts(0, 0)
+
+    def test_reconcile_fixes_drift(self):
+        from .services import reconcile_active_task_counts
+
+        self.make_request(assigned_to_volunteer=self.alice, status='Assigned')
+        Profile.objects.filter(user=self.alice).update(active_task_count=5)
+        Profile.objects.filter(user=self.bob).update(active_task_count=2)
+        fixes = reconcile_active_task_counts()
+        self.assertCountEqual(fixes, [(self.alice.id, 5, 1), (self.bob.id, 2, 0)])
+        self.assertCounts(1, 0)
+
+
+class ArchivedRequestAdminTests(TestCase):
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('admin', password='x')
+        self.client.force_login(self.admin_user)
+        now = timezone.now()
+        self.archived = ArchivedReliefRequest.objects.create(
+            id=1, requester=self.admin_user, request_type='Food', description='Need food',
+            latitude=12.97, longitude=77.59, status='Completed', created_at=now, updated_at=now,
+        )
+
+    def test_changelist_and_detail_are_viewable(self):
+        self.assertEqual(self.client.get('/admin/core_app/archivedreliefrequest/').status_code, 200)
+        response = self.client.get(f'/admin/core_app/archivedreliefrequest/{self.archived.pk}/change/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'name="_save"')
+
+    def test_cannot_add_or_delete(self):
+        self.assertEqual(self.client.get('/admin/core_app/archivedreliefrequest/add/').status_code, 403)
+        response = self.client.get(f'/admin/core_app/archivedreliefrequest/{self.archived.pk}/delete/')
+        self.assertEqual(response.status_code, 403)
+
+
+class AlertExpiryTests(SimpleTestCase):
+    """Active-alert reads against the in-memory MongoDB stub used by the benchmarks."""
+
+    def setUp(self):
+        from benchmarks.mongo_stub import InMemoryCollection
+
+        self.collection = InMemoryCollection()
+        patcher = mock.patch.object(alerts, '_collection', lambda name=alerts.ALERTS_COLLECTION: self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(alerts.bump_version)
+        alerts.bump_version()
+
+    def add_alert(self, message, **fields):
+        self.collection.insert_one({
+            'message': message, 'severity': 'Critical', 'is_active': True,
+            'posted_by': 'admin', 'timestamp': timezone.now(), **fields,
+        })
+
+    def test_alert_without_expiry_is_listed_and_expired_one_is_not(self):
+        now = timezone.now()
+        self.add_alert('legacy')
+        self.add_alert('expired', expires_at=now - datetime.timedelta(minutes=1))
+        self.add_alert('current', expires_at=now + datetime.timedelta(hours=1))
+
+        self.assertCountEqual([a['message'] for a in alerts.get_active_alerts()], ['legacy', 'current'])
+        self.assertIn(alerts.get_latest_critical_alert()['message'], ('legacy', 'current'))
+
+
+@override_settings(DUPLICATE_REQUEST_RADIUS_KM=0.2, DUPLICATE_REQUEST_WINDOW_MINUTES=120)
+class DuplicateSubmissionTests(TestCase):
+    KM_PER_DEGREE = 111.195  # haversine, as calculate_distance uses
+
+    def setUp(self):
+        self.victim = User.objects.create_user('victim')
+        self.neighbour = User.objects.create_user('neighbour')
+        self.existing = self.submit(self.victim, 'Need water')[0]
+
+    def submit(self, requester, description, north_km=0.0, request_type='Water'):
+        from .dedup import submit_request
+
+        return submit_request(ReliefRequest(
+            requester=requester, request_type=request_type, description=description,
+            latitude=12.97 + north_km / self.KM_PER_DEGREE, longitude=77.59,
+        ))
+
+    def test_created(self):
+        self.assertEqual(self.existing.report_count, 1)
+        self.assertEqual(ReliefRequest.objects.count(), 1)
+
+    def test_merged(self):
+        merged, outcome = self.submit(self.victim, 'Two children, no water since yesterday', north_km=0.05)
+        self.assertEqual((merged.pk, outcome), (self.existing.pk, 'merged'))
+        self.assertEqual(merged.report_count, 2)
+        self.assertIn('[Also reported] Two children, no water since yesterday', merged.description)
+
+        # The same text again only counts the report
+        merged, _ = self.submit(self.victim, 'Two children, no water since yesterday')
+        self.assertEqual(merged.report_count, 3)
+        self.assertEqual(merged.description.count('Two children'), 1)
+        self.assertEqual(ReliefRequest.objects.count(), 1)
+
+    def test_linked_keeps_the_report(self):
+        linked, outcome = self.submit(self.neighbour, 'Need water', north_km=0.1)
+        self.assertEqual((linked.pk, outcome), (self.existing.pk, 'linked'))
+        self.assertEqual(linked.report_count, 2)
+        self.assertEqual(list(linked.co_requesters.all()), [self.neighbour])
+        self.assertIn('[Also reported by neighbour at 12.970899, 77.590000] Need water', linked.description)
+
+        # Linking again counts nobody twice
+        linked, _ = self.submit(self.neighbour, 'Pipe burst on our street', north_km=0.1)
+        self.assertEqual(linked.report_count, 2)
+        self.assertIn('Pipe burst on our street', linked.description)
+
+    def test_radius_edge(self):
+        self.assertEqual(self.submit(self.neighbour, 'Need water', north_km=0.19)[1], 'linked')
+        self.assertEqual(self.submit(self.neighbour, 'Need water', north_km=0.21)[1], 'created')
+
+    def test_window_edge(self):
+        ReliefRequest.objects.filter(pk=self.existing.pk).update(
+            created_at=timezone.now() - datetime.timedelta(minutes=119),
+        )
+        self.assertEqual(self.submit(self.victim, 'Still no water')[1], 'merged')
+        ReliefRequest.objects.filter(pk=self.existing.pk).update(
+            created_at=timezone.now() - datetime.timedelta(minutes=121),
+        )
+        self.assertEqual(self.submit(self.victim, 'Still no water')[1], 'created')
+
+    def test_other_type_or_closed_request_is_not_a_duplicate(self):
+        self.assertEqual(self.submit(self.victim, 'Need food', request_type='Food')[1], 'created')
+        ReliefRequest.objects.filter(pk=self.existing.pk).update(status='Completed')
+        self.assertEqual(self.submit(self.victim, 'Need water')[1], 'created')
+
+
+class LiveEventPublishTests(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user('requester')
+
+    def save_request(self):
+        relief_request = ReliefRequest(
+            requester=self.requester, request_type='Water', description='Need water',
+            latitude=12.97, longitude=77.59,
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            relief_request.save()
+        return callbacks
+
+    @override_settings(LIVE_EVENTS_ENABLED=False)
+    def test_nothing_is_built_while_disabled(self):
+        with mock.patch('core_app.events.request_payload') as payload, \
+                mock.patch('core_app.events.hub.publish') as hub_publish:
+            self.save_request()
+        payload.assert_not_called()
+        hub_publish.assert_not_called()
+
+    @override_settings(LIVE_EVENTS_ENABLED=True, LIVE_EVENTS_BROKER=None)
+    def test_payload_is_built_on_commit(self):
+        with mock.patch('core_app.events.hub.publish') as hub_publish:
+            self.save_request()
+        event_type, data = hub_publish.call_args.args
+        self.assertEqual(event_type, 'request.created')
+        self.assertEqual((data['requester'], data['status']), ('requester', 'Pending'))
+
+
+@override_settings(LOCATION_FLUSH_INTERVAL=5, LOCATION_MIN_INTERVAL_SECONDS=10)
+class LocationBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('volunteer')
+        self.clock = 1000.0
+        for target, kwargs in [
+            ('core_app.locations._ensure_flusher', {}),
+            ('core_app.locations.time.monotonic', {'side_effect': lambda: self.clock}),
+        ]:
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(locations._pending.clear)
+        self.addCleanup(locations._last_stored.clear)
+
+    def ping(self, latitude, seconds_ago=0):
+        locations.record_location(self.user.id, latitude, 77.59, timezone.now() - datetime.timedelta(seconds=seconds_ago))
+
+    def stored_latitude(self):
+        latitude = Profile.objects.get(user=self.user).latitude
+        return latitude if latitude is None else float(latitude)
+
+    def test_pings_are_buffered_until_flushed(self):
+        self.ping(12.1)
+        self.ping(12.2)
+        self.assertIsNone(self.stored_latitude())
+        self.assertEqual(locations.flush_locations(), 1)
+        self.assertEqual(self.stored_latitude(), 12.2)
+        self.assertIsNone(locations.pending_location(self.user.id))
+
+    def test_fixes_are_throttled_per_user(self):
+        self.ping(12.1)
+        locations.flush_locations()
+        self.ping(12.2)
+        self.clock += 5
+        self.assertEqual(locations.flush_locations(), 0)
+        self.assertEqual(self.stored_latitude(), 12.1)
+        self.clock += 5
+        self.assertEqual(locations.flush_locations(), 1)
+        self.assertEqual(self.stored_latitude(), 12.2)
+
+    def test_force_ignores_the_throttle(self):
+        self.ping(12.1)
+        locations.flush_locations()
+        self.ping(12.2)
+        self.assertEqual(locations.flush_locations(force=True), 1)
+        self.assertEqual(self.stored_latitude(), 12.2)
+
+    @override_settings(LOCATION_FLUSH_INTERVAL=0)
+    def test_write_through_stores_every_fix(self):
+        self.ping(12.1)
+        self.ping(12.2)
+        self.assertEqual(self.stored_latitude(), 12.2)
+        self.assertFalse(locations._pending)
+
+    def test_older_fix_does_not_overwrite_newer_location(self):
+        self.ping(12.1)
+        locations.flush_locations()
+        self.ping(12.2, seconds_ago=60)
+        self.assertEqual(locations.flush_locations(force=True), 0)
+        self.assertEqual(self.stored_latitude(), 12.1)
+
+    def test_failed_write_is_buffered_again(self):
+        self.ping(12.1)
+        with mock.patch('core_app.locations._store', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                locations.flush_locations()
+        self.assertEqual(locations.pending_location(self.user.id)[0], 12.1)
+        locations.flush_locations()
+        self.assertEqual(self.stored_latitude(), 12.1)
+
+    def test_stale_throttle_entries_are_evicted(self):
+        self.ping(12.1)
+        locations.flush_locations()
+        self.assertIn(self.user.id, locations._last_stored)
+        self.clock += 10
+        locations.flush_locations()
+        self.assertNotIn(self.user.id, locations._last_stored)
+
+
+@override_settings(
+    ASSIGNMENT_JOB_MAX_ATTEMPTS=3, ASSIGNMENT_JOB_RETRY_DELAY_SECONDS=30, ASSIGNMENT_JOB_TIMEOUT_SECONDS=300,
+)
+class AssignmentJobTests(TestCase):
+    def setUp(self):
+        self.victim = User.objects.create_user('victim')
+
+    def make_job(self, **kwargs):
+        relief_request = ReliefRequest.objects.create(
+            requester=self.victim, request_type='Food', description='Need food', latitude=12.97, longitude=77.59,
+        )
+        return AssignmentJob.objects.create(relief_request=relief_request, **kwargs)
+
+    def make_volunteer(self, username, active_task_count=0):
+        volunteer = User.objects.create_user(username, is_staff=True)
+        Profile.objects.filter(user=volunteer).update(role='volunteer', active_task_count=active_task_count)
+        return volunteer
+
+    def test_claim_marks_jobs_running(self):
+        job = self.make_job()
+        later = self.make_job(run_after=timezone.now() + datetime.timedelta(minutes=5))
+        self.assertEqual(jobs.claim_jobs('w1'), [job])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), ('running', 1, 'w1'))
+        self.assertIsNotNone(job.locked_at)
+        # Neither a running job nor one not yet due is claimed
+        self.assertEqual(jobs.claim_jobs('w2'), [])
+        later.refresh_from_db()
+        self.assertEqual(later.status, 'queued')
+
+    def test_claim_skips_locked_jobs(self):
+        self.make_job()
+        with mock.patch.object(AssignmentJob.objects, 'select_for_update', wraps=AssignmentJob.objects.select_for_update) as lock:
+            jobs.claim_jobs('w1')
+        lock.assert_called_once_with(skip_locked=True)
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = self.make_job()
+        jobs.claim_jobs('crashed')
+        AssignmentJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - datetime.timedelta(seconds=301))
+        self.assertEqual(jobs.claim_jobs('w2'), [job])
+        job.refresh_from_db()
+        self.assertEqual((job.worker, job.attempts), ('w2', 2))
+
+    def test_retry_with_backoff_then_fail(self):
+        job = self.make_job()
+        for attempt, delay in [(1, 30), (2, 60)]:
+            AssignmentJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            [job] = jobs.claim_jobs('w1')
+            started = timezone.now()
+            jobs.run_job(job)
+            self.assertEqual((job.status, job.attempts), ('queued', attempt))
+            self.assertAlmostEqual((job.run_after - started).total_seconds(), delay, delta=5)
+        AssignmentJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        [job] = jobs.claim_jobs('w1')
+        jobs.run_job(job)
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_assigns_volunteer_with_capacity(self):
+        self.make_volunteer('busy', active_task_count=1)
+        free = self.make_volunteer('free')
+        job = self.make_job()
+        jobs.run_job(jobs.claim_jobs('w1')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.assigned_volunteer), ('done', free))
+
+    def test_volunteer_taken_meanwhile_is_skipped(self):
+        first = self.make_volunteer('first')
+        second = self.make_volunteer('second')
+        choose = jobs.choose_best_volunteer
+        picks = []
+
+        def racing_choose(*args, **kwargs):
+            picks.append(choose(*args, **kwargs))
+            if len(picks) == 1:
+                # Another worker assigns the pick between the ranking and the lock
+                Profile.objects.filter(user=picks[0]).update(active_task_count=1)
+            return picks[-1]
+
+        job = self.make_job()
+        with mock.patch('core_app.jobs.choose_best_volunteer', side_effect=racing_choose):
+            jobs.run_job(jobs.claim_jobs('w1')[0])
+        self.assertEqual(picks[0], first)
+        job.refresh_from_db()
+        self.assertEqual(job.assigned_volunteer, second)
+
+    def test_falls_back_to_busy_volunteer(self):
+        busy = self.make_volunteer('busy', active_task_count=1)
+        job = self.make_job()
+        jobs.run_job(jobs.claim_jobs('w1')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.assigned_volunteer), ('done', busy))
+
+    def test_admin_action_reports_jobs_actually_queued(self):
+        queued = self.make_job()
+        other = ReliefRequest.objects.create(
+            requester=self.victim, request_type='Food', description='Need food', latitude=12.97, longitude=77.59,
+        )
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        response = self.client.post('/admin/core_app/reliefrequest/', {
+            'action': 'queue_auto_assignment',
+            '_selected_action': [str(queued.relief_request_id), str(other.pk)],
+        }, follow=True)
+        self.assertContains(response, 'Auto-assignment queued for 1 pending requests. 1 were already queued or running.')
+        self.assertEqual(AssignmentJob.objects.count(), 2)
+
+    @override_settings(ASSIGNMENT_JOB_REQUIRE_CAPACITY=True)
+    def test_require_capacity_retries_instead(self):
+        self.make_volunteer('busy', active_task_count=1)
+        job = self.make_job()
+        jobs.run_job(jobs.claim_jobs('w1')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.assigned_volunteer), ('queued', None))
+        self.assertEqual(job.relief_request.status, 'Pending')
+
+
+@override_settings(METRICS_TOKEN='s3cret', METRICS_ALLOWED_IPS=[])
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def test_token_access(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    def test_non_ascii_authorization_is_refused(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer sécret').status_code, 403)
+
+    def test_unknown_methods_share_one_label(self):
+        self.client.generic('BREW', '/metrics')
+        self.client.get('/metrics')
+        exposition = metrics.registry.exposition()
+        self.assertIn('method="other"', exposition)
+        self.assertIn('method="GET"', exposition)
+        self.assertNotIn('BREW', exposition)
 
-# Create your tests here.
@@ -8,10 +8,15 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('volunteer/dashboard/', views.volunteer_dashboard_view, name='volunteer_dashboard'),
+    path('volunteer/nearby/', views.nearby_requests_view, name='nearby_requests'),
 
     path('request/<int:request_id>/assign/', views.assign_request_view, name='assign_request'),
     path('request/<int:request_id>/auto-assign/', views.auto_assign_request_view, name='auto_assign_request'),
     path('request/<int:request_id>/details/', views.request_detail_view, name='request_detail'),
+    path('requests/batch-assign/', views.batch_assign_view, name='batch_assign'),
+    path('requests/export/', views.export_requests_view, name='export_requests'),
+    path('map/clusters/<int:z>/<int:x>/<int:y>/', views.map_clusters_view, name='map_clusters'),
+    path('events/', views.live_events_view, name='live_events'),
 
     path('alerts/create/', views.create_alert_view, name='create_alert'),
     path('pending-approval/', views.pending_approval_view, name='pending_approval'),
@@ -3,42 +3,40 @@
 # --- Django Core Imports ---
 from django.shortcuts import render, redirect
 from django.contrib.auth.forms import AuthenticationForm
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.conf import settings  # To access MongoDB settings
-from django.db import transaction  # ✅ ADDED
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 
 # --- Third-Party and Utility Imports ---
-from pymongo import MongoClient
+from bson.errors import InvalidId
 from bson.objectid import ObjectId  # To work with MongoDB's _id field
 import datetime  # For timestamps
 
 # --- Local Services ---
-from .services import choose_best_volunteer  # ✅ ADDED
-
-
-# --- HELPER FUNCTIONS ---
-def get_mongo_collection(collection_name):
-    """Helper function to connect to a specific MongoDB collection."""
-    client = MongoClient(settings.MONGO_URI)
-    db = client[settings.MONGO_DB_NAME]
-    return db[collection_name]
+from . import alerts  # MongoDB alerts repository (shared connection pool)
 
 
 # --- VIEW FUNCTIONS ---
 
 def landing_page_view(request):
-    """Renders the main landing page and fetches a critical alert if one exists."""
-    alerts_collection = get_mongo_collection('alerts')
-    emergency_alert = alerts_collection.find_one(
-        {'is_active': True, 'severity': 'Critical'},
-        sort=[('timestamp', -1)]  # -1 means descending order (newest first)
-    )
-    context = {
-        'emergency_alert': emergency_alert
-    }
-    return render(request, 'core_app/landing_page.html', context)
+    """
+    Renders the main landing page and fetches a critical alert if one exists.
+    Anonymous visitors get a copy cached per alerts version, with ETag/304 support.
+    """
+    from . import pagecache
+
+    def build(request):
+        emergency_alert = alerts.get_latest_critical_alert()
+        context = {
+            'emergency_alert': emergency_alert
+        }
+        return render(request, 'core_app/landing_page.html', context)
+
+    return pagecache.cached_page(request, 'landing', alerts.get_version(), build)
 
 
 # inside core_app/views.py
@@ -83,19 +81,15 @@ def login_view(request):
     if request.method == 'POST':
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.info(request, f"Welcome back, {username}.")
-                # SMART REDIRECT based on user role
-                if user.is_staff:
-                    return redirect('volunteer_dashboard')
-                else:
-                    return redirect('dashboard')
+            # is_valid() already authenticated the user; don't hash the password again
+            user = form.get_user()
+            login(request, user)
+            messages.info(request, f"Welcome back, {user.username}.")
+            # SMART REDIRECT based on user role
+            if user.is_staff:
+                return redirect('volunteer_dashboard')
             else:
-                messages.error(request, "Invalid username or password.")
+                return redirect('dashboard')
         else:
             messages.error(request, "Invalid username or password.")  # Error message for form-level errors
     else:
@@ -125,10 +119,17 @@ def dashboard_view(request):
     if request.method == 'POST':
         form = ReliefRequestForm(request.POST)
         if form.is_valid():
+            from .dedup import submit_request
+
             relief_request = form.save(commit=False)
             relief_request.requester = request.user
-            relief_request.save()
-            messages.success(request, "Your relief request has been submitted!")
+            relief_request, outcome = submit_request(relief_request)
+            if outcome == 'merged':
+                messages.info(request, "You already have an open request like this nearby; we've added your update to it.")
+            elif outcome == 'linked':
+                messages.info(request, "A matching request nearby is already being handled; you've been added to it.")
+            else:
+                messages.success(request, "Your relief request has been submitted!")
             return redirect('dashboard')
         else:
             for field, errors in form.errors.items():
@@ -137,43 +138,160 @@ def dashboard_view(request):
     else:
         form = ReliefRequestForm()
 
-    user_requests = request.user.submitted_requests.all().order_by('-created_at')
-    alerts_collection = get_mongo_collection('alerts')
-    global_alerts = list(alerts_collection.find({'is_active': True}).sort('timestamp', -1))
+    # Live and archived requests alike; linked_requests are other people's requests
+    # this user's submissions were folded into as duplicates
+    from .archive import request_history
+    user_requests, linked_requests = request_history(request.user)
+    global_alerts = alerts.get_active_alerts()
 
     context = {
         'form': form,
         'user_requests': user_requests,
+        'linked_requests': linked_requests,
         'global_alerts': global_alerts,
     }
     return render(request, 'core_app/dashboard.html', context)
 
 @login_required(login_url='login')
 def volunteer_dashboard_view(request):
-    """Volunteer/Admin dashboard to view all active requests and show volunteer location info."""
+    """
+    Volunteer/Admin dashboard to view all active requests and show volunteer location info.
+    Requests are keyset-paginated; add ?format=json for the same page as JSON.
+    """
     from .models import ReliefRequest
+    from .pagination import keyset_page
 
     if not request.user.is_staff:
         messages.error(request, "You do not have permission to view this page.")
         return redirect('dashboard')
 
-    # Fetch requests and global alerts
-    all_requests = ReliefRequest.objects.exclude(status='Completed').order_by('created_at')
-    alerts_collection = get_mongo_collection('alerts')
-    global_alerts = list(alerts_collection.find({'is_active': True}).sort('timestamp', -1))
+    # Filters (unknown values are ignored)
+    open_statuses = [
+        choice for choice in ReliefRequest.STATUS_CHOICES if choice[0] not in ReliefRequest.CLOSED_STATUSES
+    ]
+    status_filter = request.GET.get('status', '')
+    if status_filter not in dict(open_statuses):
+        status_filter = ''
+    type_filter = request.GET.get('type', '')
+    if type_filter not in dict(ReliefRequest.REQUEST_TYPE_CHOICES):
+        type_filter = ''
+
+    # Only open requests and only the columns the table shows, requester joined
+    # in the same query. The excludes match request_open_created_idx's condition.
+    open_requests = (
+        ReliefRequest.objects.exclude(status='Completed').exclude(status='Cancelled')
+        .select_related('requester')
+        .only('id', 'request_type', 'status', 'created_at', 'report_count', 'requester__username')
+    )
+    if status_filter:
+        open_requests = open_requests.filter(status=status_filter)
+    if type_filter:
+        open_requests = open_requests.filter(request_type=type_filter)
+
+    page_size = getattr(settings, 'VOLUNTEER_DASHBOARD_PAGE_SIZE', 50)
+    all_requests, next_cursor = keyset_page(open_requests, request.GET.get('after'), page_size)
+
+    # Latest auto-assignment job per request on this page (see core_app/jobs.py)
+    from .jobs import latest_batch_job, latest_jobs, queue_summary
+    jobs = latest_jobs([r.id for r in all_requests])
+    for r in all_requests:
+        r.assignment_job = jobs.get(r.id)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'requests': [
+                {
+                    'id': r.id,
+                    'requester': r.requester.username,
+                    'request_type': r.request_type,
+                    'status': r.status,
+                    'report_count': r.report_count,
+                    'created_at': r.created_at.isoformat(),
+                    'assignment_job': r.assignment_job and {
+                        'status': r.assignment_job.status,
+                        'attempts': r.assignment_job.attempts,
+                        'result': r.assignment_job.result,
+                    },
+                }
+                for r in all_requests
+            ],
+            'next_cursor': next_cursor,
+        })
+
+    global_alerts = alerts.get_active_alerts()
 
     # fetch user's profile if it exists (signals should create it for new users,
     # but handle the case where it is missing)
     profile = getattr(request.user, 'profile', None)
+    if profile is not None:
+        # Show a location fix that is still waiting in the write buffer
+        from .locations import pending_location
+        fix = pending_location(request.user.id)
+        if fix is not None:
+            profile.latitude, profile.longitude, profile.location_updated_at = fix
 
     context = {
         'all_requests': all_requests,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+        'status_filter': status_filter,
+        'type_filter': type_filter,
+        'status_choices': open_statuses,
+        'type_choices': ReliefRequest.REQUEST_TYPE_CHOICES,
         'global_alerts': global_alerts,
         'profile': profile,  
+        'job_summary': queue_summary() if request.user.is_superuser else None,
+        'batch_job': latest_batch_job() if request.user.is_superuser else None,
+        'live_events_enabled': getattr(settings, 'LIVE_EVENTS_ENABLED', False),
     }
     return render(request, 'core_app/volunteer_dashboard.html', context)
 
 
+@login_required(login_url='login')
+def nearby_requests_view(request):
+    """
+    JSON: the k nearest Pending requests to the volunteer's stored location.
+    Query params: k (default 10, max 50), types=Medical,Food to filter, or mine=1 for
+    the categories in the volunteer's own skills.
+    """
+    from .models import ReliefRequest
+    from .nearby import nearest_pending
+    from .skills import skill_names
+
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Staff only"}, status=403)
+
+    try:
+        k = min(max(int(request.GET.get('k', 10)), 1), 50)
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "k must be a number"}, status=400)
+
+    profile = getattr(request.user, 'profile', None)
+    if request.GET.get('mine') in ('1', 'true'):
+        request_types = skill_names(profile.skill_tags) if profile else []
+    else:
+        request_types = [t for t in request.GET.get('types', '').split(',') if t]
+        unknown = set(request_types) - set(dict(ReliefRequest.REQUEST_TYPE_CHOICES))
+        if unknown:
+            return JsonResponse({"status": "error", "message": f"Unknown types: {', '.join(sorted(unknown))}"}, status=400)
+
+    # Prefer a fix still waiting in the location write buffer
+    from .locations import pending_location
+    fix = pending_location(request.user.id)
+    if fix is not None:
+        lat, lon = fix[0], fix[1]
+    elif profile is not None and profile.latitude is not None and profile.longitude is not None:
+        lat, lon = profile.latitude, profile.longitude
+    else:
+        return JsonResponse({"status": "error", "message": "Share your location first."}, status=400)
+
+    return JsonResponse({
+        'origin': {'latitude': float(lat), 'longitude': float(lon)},
+        'types': request_types,
+        'requests': nearest_pending(lat, lon, k=k, request_types=request_types),
+    })
+
+
 @login_required(login_url='login')
 def assign_request_view(request, request_id):
     """Allows a staff member to assign a pending request to themselves."""
@@ -185,11 +303,15 @@ def assign_request_view(request, request_id):
         return redirect('dashboard')
 
     try:
-        relief_request = ReliefRequest.objects.get(pk=request_id)
-        if relief_request.status == 'Pending':
-            relief_request.assigned_to_volunteer = request.user
-            relief_request.status = 'Assigned'
-            relief_request.save()
+        # Lock the row so two volunteers clicking at once can't both take it
+        with transaction.atomic():
+            relief_request = ReliefRequest.objects.select_for_update().get(pk=request_id)
+            assigned = relief_request.status == 'Pending'
+            if assigned:
+                relief_request.assigned_to_volunteer = request.user
+                relief_request.status = 'Assigned'
+                relief_request.save(update_fields=['assigned_to_volunteer', 'status', 'updated_at'])
+        if assigned:
             messages.success(request, f"You have successfully assigned request #{relief_request.id} to yourself.")
         else:
             messages.warning(request, f"Request #{relief_request.id} has already been assigned.")
@@ -199,14 +321,15 @@ def assign_request_view(request, request_id):
     return redirect('volunteer_dashboard')
 
 
-# ✅ NEW: Auto-assign to the best volunteer (atomic + race-safe)
+# ✅ NEW: Auto-assign to the best volunteer (queued, run by assignment workers)
 @login_required(login_url='login')
-@transaction.atomic
 def auto_assign_request_view(request, request_id):
     """
-    Atomically assign a pending request to the best volunteer chosen by services.choose_best_volunteer.
+    Queue auto-assignment of a pending request; an assignment_worker process picks the
+    best volunteer with services.choose_best_volunteer (see core_app/jobs.py).
     Only superuser (NGO/admin) can perform this action (button is shown only to superusers).
     """
+    from .jobs import enqueue_assignment
     from .models import ReliefRequest
 
     if not request.user.is_superuser:
@@ -214,8 +337,7 @@ def auto_assign_request_view(request, request_id):
         return redirect('dashboard')
 
     try:
-        # Lock the row to avoid double assignment under concurrent clicks
-        relief_request = ReliefRequest.objects.select_for_update().get(pk=request_id)
+        relief_request = ReliefRequest.objects.only('id', 'status').get(pk=request_id)
     except ReliefRequest.DoesNotExist:
         messages.error(request, "This request does not exist.")
         return redirect('volunteer_dashboard')
@@ -224,21 +346,138 @@ def auto_assign_request_view(request, request_id):
         messages.warning(request, f"Request #{relief_request.id} is already {relief_request.status}.")
         return redirect('volunteer_dashboard')
 
-    # <-- IMPORTANT: pass the relief_request object to the service function -->
-    volunteer = choose_best_volunteer(relief_request, max_active_tasks=1)
+    job, created = enqueue_assignment(relief_request, requested_by=request.user)
+    if created:
+        messages.success(request, f"Request #{relief_request.id} queued for auto-assignment.")
+    else:
+        messages.info(request, f"Request #{relief_request.id} is already {job.status} for auto-assignment.")
+    return redirect('volunteer_dashboard')
 
-    if volunteer is None:
-        messages.warning(request, "No eligible volunteers are available right now.")
-        return redirect('volunteer_dashboard')
 
-    relief_request.assigned_to_volunteer = volunteer
-    relief_request.status = 'Assigned'
-    relief_request.save(update_fields=['assigned_to_volunteer', 'status', 'updated_at'])
+@login_required(login_url='login')
+def batch_assign_view(request):
+    """
+    Queue a batch assignment of every Pending request; an assignment_worker
+    process runs the batch matching engine (see core_app/assignment.py).
+    Only superuser (NGO/admin) can perform this action.
+    """
+    from .jobs import enqueue_batch_assignment
+
+    if not request.user.is_superuser:
+        messages.error(request, "Only NGO/admin can auto-assign volunteers.")
+        return redirect('dashboard')
+
+    if request.method != 'POST':
+        return redirect('volunteer_dashboard')
 
-    messages.success(request, f"Request #{relief_request.id} assigned to {volunteer.username}.")
+    job, created = enqueue_batch_assignment(requested_by=request.user)
+    if created:
+        messages.success(request, "Batch auto-assignment of all pending requests queued.")
+    else:
+        messages.info(request, f"A batch auto-assignment is already {job.status}.")
     return redirect('volunteer_dashboard')
 
 
+@login_required(login_url='login')
+def export_requests_view(request):
+    """
+    Streams relief requests for partner agencies (NGO/admin only).
+    Query params: format=ndjson|csv|geojson, since, until, bbox=min_lon,min_lat,max_lon,max_lat, gzip=1,
+    archived=0 to leave out archived requests
+    """
+    from django.core.handlers.asgi import ASGIRequest
+    from .export import EXPORT_FORMATS, astream_export, export_queryset, parse_bbox, parse_timestamp, stream_export
+
+    if not request.user.is_superuser:
+        messages.error(request, "You do not have permission to export requests.")
+        return redirect('dashboard')
+
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"status": "error", "message": f"Unknown format '{fmt}'"}, status=400)
+
+    try:
+        queryset = export_queryset(
+            since=parse_timestamp(request.GET.get('since')),
+            until=parse_timestamp(request.GET.get('until')),
+            bbox=parse_bbox(request.GET.get('bbox')),
+            include_archived=request.GET.get('archived') not in ('0', 'false'),
+        )
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    compress = request.GET.get('gzip') in ('1', 'true')
+    filename = f"relief_requests.{fmt}" + ('.gz' if compress else '')
+
+    # Under ASGI a sync iterator would be read into memory in full before sending
+    stream = astream_export if isinstance(request, ASGIRequest) else stream_export
+    response = StreamingHttpResponse(
+        stream(queryset, fmt, compress=compress),
+        content_type='application/gzip' if compress else EXPORT_FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required(login_url='login')
+def map_clusters_view(request, z, x, y):
+    """
+    Clustered request counts for map tile z/x/y (staff only), by request type and status.
+    Open requests only unless ?closed=1.
+    """
+    from .clusters import max_zoom, tile_clusters
+
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Staff only"}, status=403)
+    if z > max_zoom() or x >= 2 ** z or y >= 2 ** z:
+        return JsonResponse({"status": "error", "message": "Tile out of range"}, status=400)
+
+    include_closed = request.GET.get('closed') in ('1', 'true')
+    return JsonResponse(tile_clusters(z, x, y, include_closed=include_closed))
+
+
+@login_required(login_url='login')
+async def live_events_view(request):
+    """
+    Server-sent event stream of request and alert changes for the volunteer dashboard.
+    Async so that idle connections don't hold a worker thread, which needs an ASGI
+    server: under WSGI every open dashboard would pin a thread for good. So the
+    feed is off unless LIVE_EVENTS_ENABLED is set, and answers 204 (which tells
+    EventSource clients to stop reconnecting) when it is off.
+    """
+    from .events import ensure_relay, format_sse, hub
+
+    if not getattr(settings, 'LIVE_EVENTS_ENABLED', False):
+        return HttpResponse(status=204)
+    ensure_relay()
+
+    user = await request.auser()
+    if not user.is_staff:
+        return JsonResponse({"status": "error", "message": "Permission denied"}, status=403)
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    except (TypeError, ValueError):
+        last_event_id = None
+    heartbeat = getattr(settings, 'LIVE_EVENTS_HEARTBEAT', 15)
+
+    subscription = hub.subscribe(last_event_id)
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                # None (no event within the heartbeat interval) becomes a keep-alive comment
+                yield format_sse(await subscription.next_event(timeout=heartbeat))
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
 @login_required(login_url='login')
 def request_detail_view(request, request_id):
     """Displays details of a single request and allows status updates by staff."""
@@ -278,7 +517,10 @@ def request_detail_view(request, request_id):
 
 @login_required(login_url='login')
 def create_alert_view(request):
-    """Allows staff to create new global alerts stored in MongoDB."""
+    """
+    Allows staff to create new global alerts stored in MongoDB, deactivate active
+    ones and page through archived ones (?before=<cursor>).
+    """
     # Local import
     from .forms import AlertForm
 
@@ -286,15 +528,28 @@ def create_alert_view(request):
         messages.error(request, "You do not have permission to post alerts.")
         return redirect('dashboard')
 
-    alerts_collection = get_mongo_collection('alerts')
+    if request.method == 'POST' and 'deactivate' in request.POST:
+        try:
+            alert_id = ObjectId(request.POST['deactivate'])
+        except (InvalidId, TypeError):
+            messages.error(request, "Invalid alert.")
+            return redirect('create_alert')
+        if alerts.deactivate_alert(alert_id):
+            messages.success(request, "Alert deactivated.")
+        else:
+            messages.error(request, "That alert is no longer active.")
+        return redirect('create_alert')
 
     if request.method == 'POST':
         form = AlertForm(request.POST)
         if form.is_valid():
             alert_data = form.cleaned_data
+            expires_in_hours = alert_data.pop('expires_in_hours')
             alert_data['posted_by'] = request.user.username
-            alert_data['timestamp'] = datetime.datetime.now()
-            alerts_collection.insert_one(alert_data)
+            alert_data['timestamp'] = timezone.now()
+            if expires_in_hours:
+                alert_data['expires_at'] = alert_data['timestamp'] + datetime.timedelta(hours=expires_in_hours)
+            alerts.insert_alert(alert_data)
             messages.success(request, "New alert posted successfully!")
             return redirect('create_alert')
         else:
@@ -304,25 +559,30 @@ def create_alert_view(request):
     else:
         form = AlertForm()
 
-    active_alerts = list(alerts_collection.find({'is_active': True}).sort('timestamp', -1))
+    active_alerts = alerts.get_active_alerts()
+    archived_alerts, next_cursor = alerts.get_archived_alerts(request.GET.get('before'))
 
     context = {
         'form': form,
         'active_alerts': active_alerts,
+        'archived_alerts': archived_alerts,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('before'),
     }
     return render(request, 'core_app/create_alert.html', context)
 
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
-from core_app.models import Profile
 from django.utils import timezone
+from core_app.locations import record_location
 
 @csrf_exempt  # allows JS fetch post without csrf token complexity
 @login_required
 def update_location(request):
     """
     Updates volunteer's latitude and longitude via frontend 'Set My Location' button.
+    The fix is buffered and written in batches by core_app.locations.
     """
     if request.method == "POST":
         try:
@@ -331,14 +591,13 @@ def update_location(request):
             if lat_raw is None or lon_raw is None:
                 return JsonResponse({"status": "error", "message": "Missing latitude/longitude"}, status=400)
 
-            lat = float(lat_raw)
-            lon = float(lon_raw)
+            lat = round(float(lat_raw), 6)
+            lon = round(float(lon_raw), 6)
+            # Validate here: a bad value would otherwise fail the whole batched write
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                return JsonResponse({"status": "error", "message": "Latitude/longitude out of range"}, status=400)
 
-            profile = request.user.profile  # created automatically if you set up the signal
-            profile.latitude = lat
-            profile.longitude = lon
-            profile.location_updated_at = timezone.now()
-            profile.save()
+            record_location(request.user.id, lat, lon, timezone.now())
 
             return JsonResponse({"status": "success", "message": "Location updated successfully!"})
         except Exception as e: